@@ -1,32 +1,70 @@
 import os
 import uuid
+import logging
+import base64
+import binascii
 import mimetypes
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, send_from_directory, send_file, Response, stream_with_context
+from datetime import datetime
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, send_from_directory, send_file, abort
 from werkzeug.utils import secure_filename
 from config import Config
 from flask_migrate import Migrate
-from extensions import db, migrate
-from models import Asset, AssetFile
-from storage import StorageBackend
-from image_processor import ImageProcessor
-from werkzeug.datastructures import FileStorage
+from extensions import db, migrate, image_jobs
+from models import Asset, AssetFile, Blob, Upload, UploadPart
+from storage import get_storage, blob_filename
+from tasks import STATUS_PROCESSING
+from image_processor import ENCODE_PROFILES, avif_filename, check_image
+from PIL import Image, UnidentifiedImageError
+from downloads import send_stored_file, send_zip_bundle
+import search
+import metrics
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import joinedload, undefer
 
 def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
 
+    # A typo would otherwise only surface as a KeyError in every image job
+    if app.config['IMAGE_ENCODE_PROFILE'] not in ENCODE_PROFILES:
+        raise ValueError(f"IMAGE_ENCODE_PROFILE must be one of {', '.join(ENCODE_PROFILES)}, "
+                         f"got {app.config['IMAGE_ENCODE_PROFILE']!r}")
+
+    configure_logging(app)
+
     # Ensure the instance folder exists
     os.makedirs(app.instance_path, exist_ok=True)
 
     # Initialize extensions
     db.init_app(app)
-    migrate.init_app(app, db)
+    migrate.init_app(app, db, include_object=search.include_object)
+    image_jobs.init_app(app)
+    metrics.init_app(app)
+
+    # Register CLI commands
+    from cli import assets_cli
+    app.cli.add_command(assets_cli)
     
-    # Initialize storage backend
-    app.storage = StorageBackend(app.config['STORAGE_URL'])
+    init_storage(app)
 
     return app
 
+def configure_logging(app):
+    """Apply LOGGING_LEVEL to the app logger and to module loggers used outside requests"""
+    logging.basicConfig(level=app.config['LOGGING_LEVEL'])
+    app.logger.setLevel(app.config['LOGGING_LEVEL'])
+
+def init_storage(app):
+    """Attach the storage backend; called again in each forked gunicorn worker"""
+    app.storage = get_storage(
+        app.config['STORAGE_URL'],
+        max_concurrency=app.config['STORAGE_CONCURRENCY'],
+        cache_dir=app.config['STORAGE_CACHE_DIR'],
+        cache_max_bytes=app.config['STORAGE_CACHE_MAX_BYTES'],
+        log_files=app.config['STORAGE_LOG_FILES'],
+        log_sample_rate=app.config['STORAGE_LOG_SAMPLE_RATE']
+    )
+
 app = create_app()
 
 def generate_unique_filename(original_filename):
@@ -42,14 +80,197 @@ def allowed_file(filename, is_featured_image=False):
         ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'pdf', 'zip', 'spp', 'unitypackage', 'fbx', 'blend', 'webp', 'tgz', 'tar.gz', '7z'}
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def featured_image_error(featured_image):
+    """
+    Why a featured image upload can't be used, or None if it can. Only the image headers
+    are read, so broken and oversized images are turned away before anything is stored
+    """
+    if not allowed_file(featured_image.filename, is_featured_image=True):
+        return 'Invalid featured image format'
+    try:
+        check_image(featured_image.stream, app.config['IMAGE_MAX_PIXELS'])
+    except Image.DecompressionBombError as e:
+        return f"Featured image is too large: {e}"
+    except (UnidentifiedImageError, OSError):
+        return 'Invalid featured image format'
+    return None
+
+def save_asset_files(files, asset_id, stored):
+    """
+    Store uploaded files as content-addressed blobs and attach them to an asset.
+    Blob references are taken on this thread; new blobs are then written concurrently.
+    New blob filenames are added to stored before any write starts, so the caller can
+    clean up every one of them if a transfer or the transaction fails
+    """
+    pending = []
+    for file in files:
+        original_filename = secure_filename(file.filename)
+        digest, size = app.storage.digest(file)
+        filename = blob_filename(digest)
+        if Blob.acquire(digest, size):
+            pending.append((file, filename))
+        db.session.add(AssetFile(
+            filename=filename,
+            original_filename=original_filename,
+            asset_id=asset_id,
+            blob_digest=digest
+        ))
+    stored.extend(filename for _, filename in pending)
+    app.storage.save_many(pending)
+
+def release_asset_files(asset_files):
+    """
+    Drop the blob references held by asset files (anything with filename and blob_digest).
+    The asset file rows must already be deleted (or flushed as deleted), since orphaned
+    blob rows are removed and asset_file.blob_digest is a foreign key to them.
+    Returns the storage filenames no longer used by any asset file
+    """
+    orphaned = Blob.release([f.blob_digest for f in asset_files if f.blob_digest])
+    legacy = [f.filename for f in asset_files if not f.blob_digest]
+    return [blob_filename(digest) for digest in orphaned] + legacy
+
+def get_completed_uploads(upload_ids):
+    """
+    Look up chunked uploads by id, raising ValueError if any is missing or incomplete.
+    Called before anything is written to storage so a bad id changes nothing
+    """
+    uploads = {upload.id: upload for upload in Upload.query.filter(Upload.id.in_(upload_ids))} if upload_ids else {}
+    for upload_id in upload_ids:
+        upload = uploads.get(upload_id)
+        if upload is None or not upload.completed:
+            raise ValueError(f"Upload {upload_id} is missing or incomplete")
+    return [uploads[upload_id] for upload_id in dict.fromkeys(upload_ids)]
+
+def attach_uploads(asset_id, uploads):
+    """
+    Attach completed chunked uploads, from get_completed_uploads, to an asset as files.
+    Each upload's blob reference passes to its asset file
+    """
+    for upload in uploads:
+        db.session.add(AssetFile(
+            filename=upload.filename,
+            original_filename=upload.original_filename,
+            asset_id=asset_id,
+            blob_digest=upload.blob_digest
+        ))
+        db.session.delete(upload)
+
+def stage_featured_image(asset, featured_image):
+    """
+    Save a raw featured image upload and mark the asset as processing.
+    The upload is served as-is until the background job swaps in the WebP.
+    """
+    original_featured_filename = secure_filename(featured_image.filename)
+    unique_featured_filename = generate_unique_filename(original_featured_filename)
+    app.storage.save(featured_image, unique_featured_filename)
+
+    asset.featured_image = unique_featured_filename
+    asset.original_featured_image = original_featured_filename
+    asset.featured_image_width = None
+    asset.featured_image_renditions = None
+    asset.featured_image_avif = False
+    asset.featured_image_status = STATUS_PROCESSING
+    asset.featured_image_queued_at = datetime.utcnow()
+
+def encode_cursor(asset):
+    """Encode an asset's (created_at, id) position as an opaque pagination cursor"""
+    raw = f"{asset.created_at.isoformat()}|{asset.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    """Decode a pagination cursor, returning (created_at, id) or None if invalid"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, asset_id = base64.urlsafe_b64decode(padded).decode().split('|')
+        return datetime.fromisoformat(created_at), int(asset_id)
+    except (ValueError, UnicodeDecodeError, binascii.Error):
+        return None
+
+def get_asset_page(cursor=None):
+    """
+    Fetch one page of assets, newest first, using keyset pagination on (created_at, id).
+    Returns a tuple of (assets, next_cursor)
+    """
+    per_page = app.config['ASSETS_PER_PAGE']
+    query = Asset.query.options(undefer(Asset.file_count)).order_by(Asset.created_at.desc(), Asset.id.desc())
+
+    position = decode_cursor(cursor) if cursor else None
+    if position:
+        created_at, asset_id = position
+        query = query.filter(or_(
+            Asset.created_at < created_at,
+            and_(Asset.created_at == created_at, Asset.id < asset_id)
+        ))
+
+    # Fetch one extra row to know whether another page exists
+    assets = query.limit(per_page + 1).all()
+    next_cursor = None
+    if len(assets) > per_page:
+        assets = assets[:per_page]
+        next_cursor = encode_cursor(assets[-1])
+    return assets, next_cursor
+
 @app.route('/')
 def index():
-    assets = Asset.query.order_by(Asset.created_at.desc()).all()
-    return render_template('index.html', assets=assets)
+    assets, next_cursor = get_asset_page(request.args.get('cursor'))
+    return render_template('index.html', assets=assets, next_cursor=next_cursor)
+
+def serialize_asset(asset):
+    """Gallery card fields for an asset, as returned by the JSON listing and search endpoints"""
+    return {
+        'id': asset.id,
+        'title': asset.title,
+        'featured_image_url': asset.featured_image_url,
+        'featured_image_srcset': asset.featured_image_srcset,
+        'file_count': asset.file_count,
+        'url': url_for('asset_detail', id=asset.id)
+    }
+
+@app.route('/api/assets')
+def list_assets():
+    """JSON listing used by the gallery's infinite scroll"""
+    assets, next_cursor = get_asset_page(request.args.get('cursor'))
+    return jsonify({
+        'assets': [serialize_asset(asset) for asset in assets],
+        'next_cursor': next_cursor
+    })
+
+def get_search_page(query, page):
+    """
+    Run a full-text search and load the matching assets in rank order.
+    Returns a tuple of (assets, has_next)
+    """
+    asset_ids, has_next = search.search_asset_ids(query, page, app.config['ASSETS_PER_PAGE'])
+    if not asset_ids:
+        return [], False
+    by_id = {
+        asset.id: asset
+        for asset in Asset.query.options(undefer(Asset.file_count)).filter(Asset.id.in_(asset_ids))
+    }
+    return [by_id[asset_id] for asset_id in asset_ids if asset_id in by_id], has_next
+
+@app.route('/search')
+def search_assets():
+    query = request.args.get('q', '').strip()
+    page = request.args.get('page', 1, type=int)
+    assets, has_next = get_search_page(query, page)
+    return render_template('search.html', assets=assets, query=query, page=page, has_next=has_next)
+
+@app.route('/api/search')
+def api_search():
+    """JSON search results, ranked by relevance"""
+    query = request.args.get('q', '').strip()
+    page = request.args.get('page', 1, type=int)
+    assets, has_next = get_search_page(query, page)
+    return jsonify({
+        'assets': [serialize_asset(asset) for asset in assets],
+        'next_page': page + 1 if has_next else None
+    })
 
 @app.route('/asset/add', methods=['GET', 'POST'])
 def add_asset():
     if request.method == 'POST':
+        stored = []
         try:
             title = request.form.get('title')
             description = request.form.get('description')
@@ -63,59 +284,41 @@ def add_asset():
             if not featured_image:
                 return jsonify({'success': False, 'error': 'Featured image is required'})
             
-            if not allowed_file(featured_image.filename, is_featured_image=True):
-                return jsonify({'success': False, 'error': 'Invalid featured image format'})
+            error = featured_image_error(featured_image)
+            if error:
+                return jsonify({'success': False, 'error': error})
 
-            # Process and convert featured image to WebP
-            processed_image, ext = ImageProcessor.process_featured_image(featured_image)
-            
-            # Generate unique filename for featured image
-            original_featured_filename = secure_filename(featured_image.filename)
-            unique_featured_filename = f"{uuid.uuid4().hex}{ext}"
-
-            # Create a FileStorage object from the processed image
-            processed_file = FileStorage(
-                stream=processed_image,
-                filename=unique_featured_filename,
-                content_type='image/webp'
-            )
+            uploads = get_completed_uploads(request.form.getlist('upload_ids'))
 
-            # Save featured image with unique filename using storage backend
-            app.storage.save(processed_file, unique_featured_filename)
-
-            # Create asset with unique filename
+            # Create asset with its raw featured image; WebP conversion happens in the background
             asset = Asset(
                 title=title,
-                featured_image=unique_featured_filename,
-                original_featured_image=original_featured_filename,
                 license_key=license_key.strip() if license_key else None
             )
+            stage_featured_image(asset, featured_image)
+            stored.append(asset.featured_image)
             asset.set_description(description)
             db.session.add(asset)
-            db.session.commit()
+            db.session.flush()
 
-            # Save additional files with unique filenames
-            for file in additional_files:
-                if file and allowed_file(file.filename):
-                    original_filename = secure_filename(file.filename)
-                    unique_filename = generate_unique_filename(original_filename)
-                    app.storage.save(file, unique_filename)
-                    asset_file = AssetFile(
-                        filename=unique_filename,
-                        original_filename=original_filename,
-                        asset_id=asset.id
-                    )
-                    db.session.add(asset_file)
+            # Save additional files as deduplicated blobs, and attach any chunked uploads
+            save_asset_files([f for f in additional_files if f and allowed_file(f.filename)], asset.id, stored)
+            attach_uploads(asset.id, uploads)
+            search.update_asset(asset)
 
+            # One commit, so a failure above leaves no half-created asset behind
             db.session.commit()
+            image_jobs.submit(asset.id)
             return jsonify({
                 'success': True,
                 'message': 'Asset added successfully!',
-                'redirect': url_for('index')
+                'redirect': url_for('index'),
+                'status_url': url_for('asset_status', id=asset.id)
             })
 
         except Exception as e:
             db.session.rollback()
+            app.storage.delete_many(stored)
             app.logger.error(f"Error adding asset: {str(e)}", exc_info=True)
             return jsonify({
                 'success': False,
@@ -124,16 +327,159 @@ def add_asset():
 
     return render_template('add_asset.html')
 
+def upload_state(upload):
+    """JSON description of a chunked upload, used to start and resume it"""
+    return {
+        'success': True,
+        'upload_id': upload.id,
+        'part_size': upload.part_size,
+        'total_parts': upload.total_parts,
+        'received_parts': [part.part_number for part in upload.parts],
+        'completed': upload.completed
+    }
+
+@app.route('/uploads', methods=['POST'])
+def create_upload():
+    """Start a chunked upload, or resume one given its upload_id"""
+    try:
+        data = request.get_json(silent=True) or {}
+        original_filename = secure_filename(data.get('filename') or '')
+        size = data.get('size')
+
+        if not original_filename or not allowed_file(original_filename):
+            return jsonify({'success': False, 'error': 'Invalid file type'})
+        if not isinstance(size, int) or size <= 0:
+            return jsonify({'success': False, 'error': 'Invalid file size'})
+
+        # Resume an interrupted upload of the same file
+        upload_id = data.get('upload_id')
+        if upload_id:
+            upload = db.session.get(Upload, upload_id)
+            if upload and upload.size == size and upload.original_filename == original_filename:
+                return jsonify(upload_state(upload))
+
+        unique_filename = generate_unique_filename(original_filename)
+        upload = Upload(
+            id=uuid.uuid4().hex,
+            filename=unique_filename,
+            original_filename=original_filename,
+            size=size,
+            part_size=app.config['UPLOAD_PART_SIZE'],
+            storage_upload_id=app.storage.create_multipart_upload(unique_filename)
+        )
+        db.session.add(upload)
+        db.session.commit()
+        return jsonify(upload_state(upload))
+
+    except Exception as e:
+        db.session.rollback()
+        app.logger.error(f"Error starting upload: {str(e)}", exc_info=True)
+        return jsonify({'success': False, 'error': str(e)})
+
+@app.route('/uploads/<upload_id>', methods=['GET'])
+def get_upload(upload_id):
+    """State of a chunked upload, including which parts have been received"""
+    return jsonify(upload_state(Upload.query.get_or_404(upload_id)))
+
+@app.route('/uploads/<upload_id>/parts/<int:part_number>', methods=['PUT'])
+def put_upload_part(upload_id, part_number):
+    """Write one part of a chunked upload straight to storage"""
+    upload = Upload.query.get_or_404(upload_id)
+    try:
+        if upload.completed:
+            return jsonify({'success': False, 'error': 'Upload already completed'})
+        if not 1 <= part_number <= upload.total_parts:
+            return jsonify({'success': False, 'error': 'Invalid part number'})
+
+        data = request.get_data(cache=False)
+        if len(data) != upload.part_length(part_number):
+            return jsonify({'success': False, 'error': 'Unexpected part size'})
+
+        etag = app.storage.upload_part(
+            upload.filename, upload.storage_upload_id, part_number,
+            (part_number - 1) * upload.part_size, data
+        )
+        db.session.merge(UploadPart(upload_id=upload.id, part_number=part_number, etag=etag))
+        db.session.commit()
+        return jsonify({'success': True, 'part_number': part_number, 'etag': etag})
+
+    except Exception as e:
+        db.session.rollback()
+        app.logger.error(f"Error writing part {part_number} of upload {upload_id}: {str(e)}", exc_info=True)
+        return jsonify({'success': False, 'error': str(e)})
+
+@app.route('/uploads/<upload_id>/complete', methods=['POST'])
+def complete_upload(upload_id):
+    """Assemble a chunked upload once every part has been received"""
+    upload = Upload.query.get_or_404(upload_id)
+    try:
+        if not upload.completed:
+            received = {part.part_number for part in upload.parts}
+            missing = [n for n in range(1, upload.total_parts + 1) if n not in received]
+            if missing:
+                return jsonify({'success': False, 'error': 'Missing parts', 'missing_parts': missing})
+
+            app.storage.complete_multipart_upload(
+                upload.filename, upload.storage_upload_id,
+                [(part.part_number, part.etag) for part in upload.parts]
+            )
+
+            # Store the assembled file as a content-addressed blob, like direct uploads
+            digest, size = app.storage.digest_stored(upload.filename)
+            if Blob.acquire(digest, size):
+                app.storage.move(upload.filename, blob_filename(digest))
+            else:
+                app.storage.delete(upload.filename)
+            upload.filename = blob_filename(digest)
+            upload.blob_digest = digest
+            upload.completed = True
+            db.session.commit()
+        return jsonify(upload_state(upload))
+
+    except Exception as e:
+        db.session.rollback()
+        app.logger.error(f"Error completing upload {upload_id}: {str(e)}", exc_info=True)
+        return jsonify({'success': False, 'error': str(e)})
+
+@app.route('/uploads/<upload_id>', methods=['DELETE'])
+def abort_upload(upload_id):
+    """Abandon a chunked upload and discard what was written"""
+    upload = Upload.query.get_or_404(upload_id)
+    try:
+        if not upload.completed:
+            app.storage.abort_multipart_upload(upload.filename, upload.storage_upload_id)
+        db.session.delete(upload)
+        db.session.flush()
+        orphaned = release_asset_files([upload]) if upload.completed else []
+        db.session.commit()
+        app.storage.delete_many(orphaned)
+        return jsonify({'success': True})
+
+    except Exception as e:
+        db.session.rollback()
+        app.logger.error(f"Error aborting upload {upload_id}: {str(e)}", exc_info=True)
+        return jsonify({'success': False, 'error': str(e)})
+
 @app.route('/asset/<int:id>')
 def asset_detail(id):
-    asset = Asset.query.get_or_404(id)
+    asset = Asset.query.options(joinedload(Asset.files)).get_or_404(id)
     return render_template('asset_detail.html', asset=asset)
 
+@app.route('/asset/<int:id>/status')
+def asset_status(id):
+    """Featured image processing status, polled by the upload pages"""
+    asset = Asset.query.get_or_404(id)
+    return jsonify({
+        'status': asset.featured_image_status,
+        'featured_image_url': asset.featured_image_url
+    })
+
 @app.route('/asset/<int:id>/edit', methods=['GET', 'POST'])
 def edit_asset(id):
-    asset = Asset.query.get_or_404(id)
+    asset = Asset.query.options(joinedload(Asset.files)).get_or_404(id)
 
     if request.method == 'POST':
+        stored = []
         try:
             asset.title = request.form.get('title')
             if not asset.title:
@@ -143,58 +489,45 @@ def edit_asset(id):
             license_key = request.form.get('license_key')
             asset.license_key = license_key.strip() if license_key else None
 
-            # Handle featured image update
             featured_image = request.files.get('featured_image')
-            if featured_image and featured_image.filename:
-                if not allowed_file(featured_image.filename, is_featured_image=True):
-                    return jsonify({'success': False, 'error': 'Invalid featured image format'})
-
-                # Delete old featured image
-                if asset.featured_image:
-                    app.storage.delete(asset.featured_image)
-
-                # Process and convert featured image to WebP
-                processed_image, ext = ImageProcessor.process_featured_image(featured_image)
-                
-                # Generate unique filename
-                original_featured_filename = secure_filename(featured_image.filename)
-                unique_featured_filename = f"{uuid.uuid4().hex}{ext}"
-
-                # Create a FileStorage object from the processed image
-                processed_file = FileStorage(
-                    stream=processed_image,
-                    filename=unique_featured_filename,
-                    content_type='image/webp'
-                )
-
-                # Save the processed image
-                app.storage.save(processed_file, unique_featured_filename)
-                asset.featured_image = unique_featured_filename
-                asset.original_featured_image = original_featured_filename
+            replace_featured = bool(featured_image and featured_image.filename)
+            if replace_featured:
+                error = featured_image_error(featured_image)
+                if error:
+                    return jsonify({'success': False, 'error': error})
+
+            # Validate everything before storage is touched
+            uploads = get_completed_uploads(request.form.getlist('upload_ids'))
+
+            # Handle featured image update; the old image and its renditions are
+            # only deleted once the new one is committed
+            old_featured_files = []
+            if replace_featured:
+                old_featured_files = asset.featured_image_files
+                # Save the raw upload; WebP conversion happens in the background
+                stage_featured_image(asset, featured_image)
+                stored.append(asset.featured_image)
 
             # Handle additional files
             additional_files = request.files.getlist('additional_files')
-            for file in additional_files:
-                if file and allowed_file(file.filename):
-                    original_filename = secure_filename(file.filename)
-                    unique_filename = generate_unique_filename(original_filename)
-                    app.storage.save(file, unique_filename)
-                    asset_file = AssetFile(
-                        filename=unique_filename,
-                        original_filename=original_filename,
-                        asset_id=asset.id
-                    )
-                    db.session.add(asset_file)
+            save_asset_files([f for f in additional_files if f and allowed_file(f.filename)], asset.id, stored)
+            attach_uploads(asset.id, uploads)
+            search.update_asset(asset)
 
             db.session.commit()
+            app.storage.delete_many(old_featured_files)
+            if asset.featured_image_status == STATUS_PROCESSING:
+                image_jobs.submit(asset.id)
             return jsonify({
                 'success': True,
                 'message': 'Asset updated successfully!',
-                'redirect': url_for('asset_detail', id=asset.id)
+                'redirect': url_for('asset_detail', id=asset.id),
+                'status_url': url_for('asset_status', id=asset.id)
             })
 
         except Exception as e:
             db.session.rollback()
+            app.storage.delete_many(stored)
             return jsonify({
                 'success': False,
                 'error': str(e)
@@ -208,18 +541,23 @@ def delete_asset(id):
         asset = Asset.query.get_or_404(id)
         deletion_errors = []
 
-        # Delete featured image
-        if asset.featured_image:
-            if not app.storage.delete(asset.featured_image):
-                deletion_errors.append(f"Failed to delete featured image: {asset.featured_image}")
-
-        # Delete additional files
-        for file in asset.files:
-            if not app.storage.delete(file.filename):
-                deletion_errors.append(f"Failed to delete file: {file.filename}")
-            db.session.delete(file)
-
-        db.session.delete(asset)
+        # Release additional files, fetching only their names rather than full rows.
+        # Blobs still referenced by other assets are kept.
+        rows = db.session.query(AssetFile.filename, AssetFile.blob_digest).filter_by(asset_id=asset.id).all()
+        # Bulk delete the rows first so no asset file references a blob that gets removed
+        AssetFile.query.filter_by(asset_id=asset.id).delete(synchronize_session=False)
+        filenames = release_asset_files(rows)
+
+        # Delete the featured image, its renditions and the released files in one batch
+        featured_files = set(asset.featured_image_files)
+        for filename in app.storage.delete_many(asset.featured_image_files + filenames):
+            if filename in featured_files:
+                deletion_errors.append(f"Failed to delete featured image: {filename}")
+            else:
+                deletion_errors.append(f"Failed to delete file: {filename}")
+
+        Asset.query.filter_by(id=asset.id).delete(synchronize_session=False)
+        search.remove_asset(asset.id)
         db.session.commit()
 
         if deletion_errors:
@@ -240,19 +578,25 @@ def delete_asset(id):
 def delete_asset_file(id):
     try:
         asset_file = AssetFile.query.get_or_404(id)
+        asset = asset_file.asset
         asset_id = asset_file.asset_id
-        filename = asset_file.filename
         display_name = asset_file.original_filename or asset_file.filename
 
-        # Delete the file using storage backend
-        if not app.storage.delete(filename):
-            error_msg = f'Failed to delete file {display_name} from storage'
-            app.logger.error(error_msg)
-            flash(error_msg, 'error')
-            return redirect(url_for('asset_detail', id=asset_id))
-
-        # Only remove from database if storage deletion was successful
+        # Remove the row before releasing its blob, which may delete the blob row it references
         db.session.delete(asset_file)
+        db.session.flush()
+
+        # Delete the file from storage unless other assets still reference its blob
+        for orphan in release_asset_files([asset_file]):
+            if not app.storage.delete(orphan):
+                db.session.rollback()
+                error_msg = f'Failed to delete file {display_name} from storage'
+                app.logger.error(error_msg)
+                flash(error_msg, 'error')
+                return redirect(url_for('asset_detail', id=asset_id))
+
+        # Only commit the removal if storage deletion was successful
+        search.update_asset(asset)
         db.session.commit()
 
         flash('File deleted successfully!', 'success')
@@ -264,11 +608,91 @@ def delete_asset_file(id):
         flash('Failed to delete file: ' + str(e), 'error')
         return redirect(url_for('asset_detail', id=asset_id))
 
+# Featured image files served by the image route (raw uploads are shown while processing)
+IMAGE_MIME_TYPES = {
+    '.webp': 'image/webp',
+    '.avif': 'image/avif',
+    '.png': 'image/png',
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.gif': 'image/gif',
+}
+
+@app.route('/images/<filename>')
+def featured_image(filename):
+    """
+    Serve a featured image or rendition with immutable, long-lived caching.
+    Stored names are never reused, so the name doubles as a strong ETag.
+    WebP images with an AVIF copy get the copy instead when the browser explicitly
+    accepts AVIF (a bare */* doesn't count)
+    """
+    ext = os.path.splitext(filename)[1].lower()
+    if ext not in IMAGE_MIME_TYPES:
+        abort(404)
+
+    name = filename
+    if ext == '.webp' and dict(request.accept_mimetypes).get('image/avif', 0) > 0:
+        candidate = avif_filename(filename)
+        candidate_path = app.storage.local_path(candidate)
+        # Remote images are only routed here when they have AVIF copies
+        if candidate_path is None or os.path.isfile(candidate_path):
+            name = candidate
+
+    max_age = app.config['IMAGE_CACHE_MAX_AGE']
+    local_path = app.storage.local_path(name)
+    if local_path:
+        if not os.path.isfile(local_path):
+            abort(404)
+        response = send_file(
+            local_path,
+            mimetype=IMAGE_MIME_TYPES[os.path.splitext(name)[1].lower()],
+            etag=name,
+            max_age=max_age,
+            conditional=True
+        )
+    else:
+        response = redirect(app.storage.url_for(name))
+        response.cache_control.public = True
+        response.cache_control.max_age = max_age
+    response.cache_control.immutable = True
+    if ext == '.webp':
+        response.vary.add('Accept')
+    return response
+
+@app.route('/asset/<int:id>/download-all')
+def download_all(id):
+    """Download every file of an asset as one streamed ZIP archive"""
+    asset = Asset.query.get_or_404(id)
+    rows = db.session.query(AssetFile.filename, AssetFile.original_filename, Blob.size) \
+        .outerjoin(Blob, AssetFile.blob_digest == Blob.digest) \
+        .filter(AssetFile.asset_id == asset.id) \
+        .order_by(AssetFile.id).all()
+    if not rows:
+        abort(404)
+
+    try:
+        # Blob sizes are known; only files stored before deduplication need a lookup
+        files = [
+            (filename, original_filename or os.path.basename(filename),
+             size if size is not None else app.storage.info(filename)['size'])
+            for filename, original_filename, size in rows
+        ]
+    except FileNotFoundError as e:
+        app.logger.error("Missing file for bundle of asset %s: %s", asset.id, e)
+        flash('Some files of this asset are missing from storage.', 'error')
+        return redirect(url_for('asset_detail', id=asset.id))
+
+    download_name = f"{secure_filename(asset.title) or 'asset'}.zip"
+    return send_zip_bundle(app.storage, files, download_name, asset.created_at or datetime.utcnow())
+
 @app.route('/download/<int:file_id>')
 def download_file(file_id):
     """Download a file with its original filename"""
     try:
-        asset_file = AssetFile.query.get_or_404(file_id)
+        # Blob sizes are known, so blob downloads need no file details from storage
+        asset_file, size = db.session.query(AssetFile, Blob.size) \
+            .outerjoin(Blob, AssetFile.blob_digest == Blob.digest) \
+            .filter(AssetFile.id == file_id).first_or_404()
         filename = asset_file.filename
         download_name = asset_file.original_filename or filename
 
@@ -277,27 +701,25 @@ def download_file(file_id):
         if mime_type is None:
             mime_type = 'application/octet-stream'
 
-        app.logger.debug(f"Starting download of {filename} as {download_name} with type {mime_type}")
+        app.logger.debug("Starting download of %s as %s with type %s", filename, download_name, mime_type)
 
         try:
-            file_stream = app.storage.get_file_stream(filename)
-            
-            def generate():
-                try:
-                    while True:
-                        chunk = file_stream.read(8192)  # Read in 8KB chunks
-                        if not chunk:
-                            break
-                        yield chunk
-                finally:
-                    file_stream.close()
-
-            response = Response(
-                stream_with_context(generate()),
-                mimetype=mime_type
+            # Let the client fetch S3 objects directly rather than proxying the bytes
+            if app.config['S3_PRESIGNED_DOWNLOADS']:
+                presigned_url = app.storage.presigned_url(
+                    filename, download_name, mime_type,
+                    expires_in=app.config['S3_PRESIGNED_EXPIRY']
+                )
+                if presigned_url:
+                    response = redirect(presigned_url)
+                    response.headers['Cache-Control'] = 'no-store'
+                    return response
+
+            # Blobs are content-addressed, so their digest is a strong ETag
+            return send_stored_file(
+                app.storage, filename, download_name, mime_type,
+                etag=asset_file.blob_digest, size=size
             )
-            response.headers['Content-Disposition'] = f'attachment; filename="{download_name}"'
-            return response
 
         except Exception as e:
             app.logger.error(f"Error streaming file {filename}: {str(e)}", exc_info=True)
@@ -0,0 +1,50 @@
+"""Helpers shared by the benchmark scripts: timing summaries and the JSON result format"""
+import os
+import sys
+import json
+import platform
+import statistics
+import subprocess
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+def summarize(samples):
+    """Median, 95th percentile and minimum of a list of durations in seconds, in milliseconds"""
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+    return {
+        'runs': len(ordered),
+        'median_ms': round(statistics.median(ordered) * 1000, 3),
+        'p95_ms': round(p95 * 1000, 3),
+        'min_ms': round(ordered[0] * 1000, 3),
+    }
+
+def environment():
+    """What the numbers were measured on, so results from different machines aren't mixed up"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+
+def emit(name, params, results, output=None):
+    """Write one benchmark's results as a JSON document to output, or stdout"""
+    document = {'benchmark': name, 'environment': environment(), 'params': params, 'results': results}
+    if output:
+        with open(output, 'w') as f:
+            json.dump(document, f, indent=2)
+            f.write('\n')
+    else:
+        json.dump(document, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    return document
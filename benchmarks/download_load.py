@@ -0,0 +1,129 @@
+"""
+Concurrent download throughput of a running server.
+
+Starts --concurrency clients that download the given paths over keep-alive
+connections for --duration seconds, optionally alongside --slow-clients that read
+at --slow-rate KB/s the way a slow connection would. A server that lets slow readers
+hold a worker shows up as starved fast clients. Compare a plain `gunicorn app:app`
+(one sync worker) against the production profile:
+
+    gunicorn -c gunicorn.conf.py app:app &
+    python benchmarks/download_load.py --url http://127.0.0.1:5000 --path /download/1 \\
+        --concurrency 16 --slow-clients 4 --output load.json
+"""
+import time
+import argparse
+import threading
+import http.client
+from urllib.parse import urlparse
+
+from common import emit, summarize
+
+CHUNK_SIZE = 64 * 1024
+
+class Client(threading.Thread):
+    def __init__(self, url, paths, deadline, rate=None):
+        super().__init__(daemon=True)
+        self.url = url
+        self.paths = paths
+        self.deadline = deadline
+        self.rate = rate  # bytes per second, None for as fast as possible
+        self.latencies = []
+        self.first_bytes = []
+        self.bytes = 0
+        self.errors = 0
+
+    def _connect(self):
+        cls = http.client.HTTPSConnection if self.url.scheme == 'https' else http.client.HTTPConnection
+        return cls(self.url.netloc, timeout=60)
+
+    def _read(self, response):
+        started = time.perf_counter()
+        received = 0
+        while True:
+            chunk = response.read(CHUNK_SIZE)
+            if not chunk:
+                return
+            received += len(chunk)
+            self.bytes += len(chunk)
+            if self.rate:
+                # Sleep off whatever we're ahead of the target rate
+                ahead = received / self.rate - (time.perf_counter() - started)
+                if ahead > 0:
+                    time.sleep(ahead)
+            if time.monotonic() > self.deadline:
+                # Stop mid-body; the connection can't be reused after this
+                response.close()
+                raise TimeoutError
+
+    def run(self):
+        connection = self._connect()
+        n = 0
+        while time.monotonic() < self.deadline:
+            path = self.paths[n % len(self.paths)]
+            n += 1
+            start = time.perf_counter()
+            try:
+                connection.request('GET', path)
+                response = connection.getresponse()
+                self.first_bytes.append(time.perf_counter() - start)
+                if response.status != 200:
+                    self.errors += 1
+                self._read(response)
+                self.latencies.append(time.perf_counter() - start)
+            except TimeoutError:
+                break
+            except (OSError, http.client.HTTPException):
+                self.errors += 1
+                connection.close()
+                connection = self._connect()
+        connection.close()
+
+def report(clients, duration):
+    latencies = [t for c in clients for t in c.latencies]
+    first_bytes = [t for c in clients for t in c.first_bytes]
+    total_bytes = sum(c.bytes for c in clients)
+    result = {
+        'clients': len(clients),
+        'completed': len(latencies),
+        'errors': sum(c.errors for c in clients),
+        'requests_per_s': round(len(latencies) / duration, 2),
+        'mb_per_s': round(total_bytes / 1024 ** 2 / duration, 1),
+    }
+    if latencies:
+        result['latency'] = summarize(latencies)
+    if first_bytes:
+        result['time_to_first_byte'] = summarize(first_bytes)
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--url', default='http://127.0.0.1:5000', help='Server base URL')
+    parser.add_argument('--path', action='append', help='Path to download, repeatable (default /download/1)')
+    parser.add_argument('--concurrency', type=int, default=16, help='Clients downloading as fast as they can')
+    parser.add_argument('--slow-clients', type=int, default=0, help='Additional rate-limited clients')
+    parser.add_argument('--slow-rate', type=int, default=256, help='Slow client read rate in KB/s')
+    parser.add_argument('--duration', type=float, default=30, help='Seconds to run')
+    parser.add_argument('--output', help='Write the JSON results to this file instead of stdout')
+    args = parser.parse_args()
+
+    url = urlparse(args.url)
+    paths = args.path or ['/download/1']
+    deadline = time.monotonic() + args.duration
+    # Slow clients start first so they already hold connections when the load begins
+    slow = [Client(url, paths, deadline, args.slow_rate * 1024) for _ in range(args.slow_clients)]
+    fast = [Client(url, paths, deadline) for _ in range(args.concurrency)]
+    for client in slow + fast:
+        client.start()
+    for client in slow + fast:
+        client.join()
+
+    results = {'fast': report(fast, args.duration)}
+    if slow:
+        results['slow'] = report(slow, args.duration)
+    params = {'url': args.url, 'paths': paths, 'duration': args.duration,
+              'slow_rate_kb': args.slow_rate if slow else None}
+    emit('download_load', params, results, args.output)
+
+if __name__ == '__main__':
+    main()
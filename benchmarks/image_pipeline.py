@@ -0,0 +1,118 @@
+"""
+Per-upload CPU cost and output size of featured image processing.
+
+Generates synthetic PNG, JPEG, static GIF and animated GIF sources and times
+ImageProcessor.process_featured_image on each (WebP plus renditions) for every
+encode profile. Prints one JSON document so runs on different commits can be
+compared, or a Markdown table with --table:
+
+    python benchmarks/image_pipeline.py --repeat 5 --output after.json
+    python benchmarks/image_pipeline.py --avif --table
+"""
+import io
+import os
+import time
+import argparse
+import statistics
+
+from common import emit
+from PIL import Image
+from image_processor import ImageProcessor, ENCODE_PROFILES, avif_supported
+
+RENDITION_WIDTHS = [256, 512, 1024]
+
+def _photo(size):
+    """Noisy gradient that compresses roughly like a photo"""
+    noise = Image.effect_noise(size, 40).convert('RGB')
+    gradient = Image.linear_gradient('L').resize(size).convert('RGB')
+    return Image.blend(noise, gradient, 0.6)
+
+def make_png():
+    img = _photo((2400, 1600)).convert('RGBA')
+    img.putalpha(Image.radial_gradient('L').resize(img.size))
+    buf = io.BytesIO()
+    img.save(buf, 'PNG')
+    return buf.getvalue()
+
+def make_jpeg():
+    buf = io.BytesIO()
+    _photo((3000, 2000)).save(buf, 'JPEG', quality=90)
+    return buf.getvalue()
+
+def make_static_gif():
+    buf = io.BytesIO()
+    _photo((1200, 800)).convert('P').save(buf, 'GIF')
+    return buf.getvalue()
+
+def make_animated_gif():
+    frames = [_photo((480, 320)).convert('P') for _ in range(24)]
+    buf = io.BytesIO()
+    frames[0].save(buf, 'GIF', save_all=True, append_images=frames[1:], duration=40, loop=0)
+    return buf.getvalue()
+
+INPUTS = {
+    'png': make_png,
+    'jpeg': make_jpeg,
+    'static_gif': make_static_gif,
+    'animated_gif': make_animated_gif,
+}
+
+def _size(f):
+    f.seek(0, os.SEEK_END)
+    size = f.tell()
+    f.close()
+    return size
+
+def run(data, repeat, profile, avif):
+    cpu = []
+    wall = []
+    for _ in range(repeat):
+        source = io.BytesIO(data)
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        result = ImageProcessor.process_featured_image(source, RENDITION_WIDTHS, profile, avif)
+        cpu.append(time.process_time() - cpu_start)
+        wall.append(time.perf_counter() - wall_start)
+
+        sizes = {'WEBP': _size(result['image']), 'AVIF': _size(result['avif']) if result['avif'] else 0}
+        for _, image_format, rendition in result['renditions']:
+            sizes[image_format] += _size(rendition)
+    return {
+        'source_bytes': len(data),
+        'cpu_ms': round(statistics.median(cpu) * 1000, 1),
+        'wall_ms': round(statistics.median(wall) * 1000, 1),
+        'webp_bytes': sizes['WEBP'],
+        'avif_bytes': sizes['AVIF'],
+    }
+
+def print_table(results):
+    print('| input | profile | cpu ms | webp bytes | avif bytes |')
+    print('|---|---|---:|---:|---:|')
+    for name, profiles in results.items():
+        for profile, r in profiles.items():
+            print(f"| {name} | {profile} | {r['cpu_ms']} | {r['webp_bytes']} | {r['avif_bytes'] or '-'} |")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per input; the median is reported')
+    parser.add_argument('--inputs', default=','.join(INPUTS), help='Comma-separated subset of: ' + ', '.join(INPUTS))
+    parser.add_argument('--profiles', default=','.join(ENCODE_PROFILES),
+                        help='Comma-separated subset of: ' + ', '.join(ENCODE_PROFILES))
+    parser.add_argument('--avif', action='store_true', help='Also encode AVIF copies (CPU time includes them)')
+    parser.add_argument('--table', action='store_true', help='Print a Markdown table instead of JSON')
+    parser.add_argument('--output', help='Write the JSON results to this file instead of stdout')
+    args = parser.parse_args()
+    if args.avif and not avif_supported():
+        parser.error('this Pillow build cannot encode AVIF; install pillow-avif-plugin')
+
+    results = {}
+    for name in args.inputs.split(','):
+        data = INPUTS[name]()
+        results[name] = {profile: run(data, args.repeat, profile, args.avif) for profile in args.profiles.split(',')}
+
+    if args.table:
+        print_table(results)
+        return
+    emit('image_pipeline', {'repeat': args.repeat, 'avif': args.avif}, results, args.output)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Time of ImageProcessor.convert_to_webp by source size and format.
+
+Generates photo-like sources from 0.3 to 45 megapixels as PNG, JPEG, WebP and GIF
+and times the conversion of each, which includes decoding, downscaling to
+IMAGE_MAX_DIMENSION and encoding:
+
+    python benchmarks/image_sizes.py --repeat 5 --output sizes.json
+    python benchmarks/image_sizes.py --sizes 640,1920 --formats jpeg
+"""
+import io
+import time
+import argparse
+
+from common import emit, summarize
+from PIL import Image
+from image_processor import ImageProcessor, ENCODE_PROFILES
+
+# Long edge in pixels of the generated 3:2 sources
+SIZES = [640, 1920, 4096, 8192]
+FORMATS = {
+    'png': {'format': 'PNG'},
+    'jpeg': {'format': 'JPEG', 'quality': 90},
+    'webp': {'format': 'WEBP', 'quality': 90},
+    'gif': {'format': 'GIF'},
+}
+
+def make_source(long_edge, name):
+    size = (long_edge, long_edge * 2 // 3)
+    # Noise over a gradient compresses roughly like a photo
+    noise = Image.effect_noise(size, 40).convert('RGB')
+    gradient = Image.linear_gradient('L').resize(size).convert('RGB')
+    img = Image.blend(noise, gradient, 0.6)
+    if name == 'gif':
+        img = img.convert('P')
+    buf = io.BytesIO()
+    img.save(buf, **FORMATS[name])
+    return size, buf.getvalue()
+
+def run(data, repeat, profile):
+    cpu = []
+    wall = []
+    for _ in range(repeat):
+        source = io.BytesIO(data)
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        output, _ = ImageProcessor.convert_to_webp(source, profile)
+        cpu.append(time.process_time() - cpu_start)
+        wall.append(time.perf_counter() - wall_start)
+        output.close()
+    result = summarize(wall)
+    result['cpu_median_ms'] = summarize(cpu)['median_ms']
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=3, help='Conversions per source')
+    parser.add_argument('--sizes', default=','.join(str(s) for s in SIZES), help='Comma-separated long edges in pixels')
+    parser.add_argument('--formats', default=','.join(FORMATS), help='Comma-separated subset of: ' + ', '.join(FORMATS))
+    parser.add_argument('--profile', default='balanced', choices=list(ENCODE_PROFILES))
+    parser.add_argument('--output', help='Write the JSON results to this file instead of stdout')
+    args = parser.parse_args()
+
+    results = {}
+    for name in args.formats.split(','):
+        results[name] = {}
+        for long_edge in (int(s) for s in args.sizes.split(',')):
+            (width, height), data = make_source(long_edge, name)
+            result = {'width': width, 'height': height, 'source_bytes': len(data)}
+            result.update(run(data, args.repeat, args.profile))
+            results[name][str(long_edge)] = result
+
+    emit('image_sizes', {'repeat': args.repeat, 'profile': args.profile}, results, args.output)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+"""
+Request throughput of the main routes against synthetic libraries.
+
+Builds a throwaway database and local storage, grows the library to each size in
+--libraries (1k, 10k and 100k assets by default) and times requests to the gallery,
+search, asset detail and download routes through Flask's test client, so the numbers
+cover the application (queries, templates, file handling) without any HTTP server:
+
+    python benchmarks/route_throughput.py --output routes.json
+    python benchmarks/route_throughput.py --libraries 1000 --requests 50
+    python benchmarks/route_throughput.py --database-url postgresql://localhost/bench
+
+A --database-url must point at an empty database; it is migrated and filled.
+"""
+import os
+import sys
+import time
+import random
+import hashlib
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+
+from common import ROOT, emit, summarize
+
+WORDS = ('forest', 'castle', 'robot', 'dragon', 'street', 'ocean', 'desert', 'temple', 'garden', 'station',
+         'bridge', 'market', 'tower', 'cave', 'harbor', 'village', 'ruins', 'canyon', 'glacier', 'reactor')
+DOWNLOAD_BYTES = 1024 * 1024
+INSERT_BATCH = 5000
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--libraries', default='1000,10000,100000', help='Comma-separated library sizes, ascending')
+    parser.add_argument('--requests', type=int, default=200, help='Requests per route and library size')
+    parser.add_argument('--database-url', help='Empty database to use instead of a temporary SQLite file')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Write the JSON results to this file instead of stdout')
+    return parser.parse_args()
+
+def configure(work_dir, database_url):
+    """Point the app at throwaway storage before config.py reads the environment"""
+    os.environ.update({
+        'DATABASE_URL': database_url or f"sqlite:///{os.path.join(work_dir, 'bench.db')}",
+        'STORAGE_URL': f"file://{os.path.join(work_dir, 'uploads')}",
+        'IMAGE_WORKERS': '0',
+        'LOGGING_LEVEL': 'WARNING',
+    })
+    os.makedirs(os.path.join(work_dir, 'uploads'), exist_ok=True)
+
+def create_blob(app, db, Blob):
+    """One stored file every synthetic asset links to, as deduplicated uploads would"""
+    from werkzeug.datastructures import FileStorage
+    from storage import blob_filename
+    import io
+
+    data = os.urandom(DOWNLOAD_BYTES)
+    digest = hashlib.sha256(data).hexdigest()
+    app.storage.save(FileStorage(stream=io.BytesIO(data), filename='bench.bin'), blob_filename(digest))
+    db.session.add(Blob(digest=digest, size=len(data), ref_count=0))
+    db.session.commit()
+    return digest
+
+def grow_library(db, models, search, digest, start, stop, rng):
+    """Insert assets start+1..stop (and one file each) in bulk, then index them for search"""
+    from storage import blob_filename
+
+    Asset, AssetFile, Blob = models
+    base = datetime(2020, 1, 1)
+    for first in range(start, stop, INSERT_BATCH):
+        last = min(first + INSERT_BATCH, stop)
+        assets = []
+        for n in range(first, last):
+            words = rng.sample(WORDS, 3)
+            assets.append({
+                'title': f"{' '.join(words).title()} {n}",
+                'description': f"<p>A <strong>{words[0]}</strong> asset with {words[1]} details.</p>",
+                'description_sanitizer': None,
+                'featured_image': f"{n:032x}.webp",
+                'featured_image_width': 1024,
+                'featured_image_renditions': '256,512',
+                'featured_image_status': 'ready',
+                'featured_image_avif': False,
+                'created_at': base + timedelta(minutes=n),
+            })
+        db.session.execute(db.insert(Asset), assets)
+        ids = [asset_id for asset_id, in db.session.query(Asset.id).order_by(Asset.id.desc()).limit(last - first)]
+        db.session.execute(db.insert(AssetFile), [
+            {'filename': blob_filename(digest), 'original_filename': f"asset-{asset_id}.zip",
+             'asset_id': asset_id, 'blob_digest': digest}
+            for asset_id in ids
+        ])
+        db.session.query(Blob).filter_by(digest=digest).update({Blob.ref_count: Blob.ref_count + len(ids)})
+        for asset in Asset.query.filter(Asset.id.in_(ids)):
+            search.update_asset(asset)
+        db.session.commit()
+
+def time_requests(client, paths, read_body=False):
+    samples = []
+    started = time.perf_counter()
+    for path in paths:
+        start = time.perf_counter()
+        response = client.get(path)
+        if read_body:
+            response.get_data()
+        response.close()
+        samples.append(time.perf_counter() - start)
+        if response.status_code != 200:
+            raise RuntimeError(f"GET {path} returned {response.status_code}")
+    result = summarize(samples)
+    result['requests_per_s'] = round(len(paths) / (time.perf_counter() - started), 1)
+    return result
+
+def main():
+    args = parse_args()
+    sizes = sorted(int(s) for s in args.libraries.split(','))
+    rng = random.Random(args.seed)
+
+    with tempfile.TemporaryDirectory(prefix='route-bench-') as work_dir:
+        configure(work_dir, args.database_url)
+        from flask_migrate import upgrade
+        from app import app
+        from extensions import db
+        from models import Asset, AssetFile, Blob
+        import search
+
+        results = {}
+        client = app.test_client()
+        with app.app_context():
+            upgrade(directory=os.path.join(ROOT, 'migrations'))
+            digest = create_blob(app, db, Blob)
+
+            count = 0
+            for size in sizes:
+                print(f"Growing library to {size} assets...", file=sys.stderr)
+                grow_library(db, (Asset, AssetFile, Blob), search, digest, count, size, rng)
+                count = size
+                asset_ids = [asset_id for asset_id, in db.session.query(Asset.id)]
+                file_ids = [file_id for file_id, in db.session.query(AssetFile.id)]
+                db.session.remove()
+
+                n = args.requests
+                results[str(size)] = {
+                    'index': time_requests(client, ['/'] * n),
+                    'api_assets': time_requests(client, ['/api/assets'] * n),
+                    'search': time_requests(client, [f"/search?q={rng.choice(WORDS)}" for _ in range(n)]),
+                    'asset_detail': time_requests(client, [f"/asset/{rng.choice(asset_ids)}" for _ in range(n)]),
+                    'download_file': time_requests(client, [f"/download/{rng.choice(file_ids)}" for _ in range(n)],
+                                                   read_body=True),
+                }
+
+    params = {'requests': args.requests, 'database': 'custom' if args.database_url else 'sqlite',
+              'download_bytes': DOWNLOAD_BYTES, 'seed': args.seed}
+    emit('route_throughput', params, results, args.output)
+
+if __name__ == '__main__':
+    main()
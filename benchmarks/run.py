@@ -0,0 +1,63 @@
+"""
+Run the whole benchmark suite and collect the results in one JSON file.
+
+Each benchmark runs in its own process. --quick uses smaller inputs and fewer
+repetitions for a fast sanity check; release numbers should use the defaults:
+
+    python benchmarks/run.py --output results-$(git describe --tags).json
+    python benchmarks/run.py --quick --only image_sizes,storage_throughput
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+
+from common import environment
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Benchmark script and its extra arguments for --quick runs
+BENCHMARKS = {
+    'image_pipeline': ['--repeat', '1', '--profiles', 'balanced'],
+    'image_sizes': ['--repeat', '1', '--sizes', '640,4096'],
+    'storage_throughput': ['--repeat', '2', '--sizes', '64K,16M'],
+    'route_throughput': ['--libraries', '1000,10000', '--requests', '50'],
+}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--only', default=','.join(BENCHMARKS), help='Comma-separated subset of: ' + ', '.join(BENCHMARKS))
+    parser.add_argument('--quick', action='store_true', help='Smaller inputs and fewer repetitions')
+    parser.add_argument('--output', help='Write the JSON results to this file instead of stdout')
+    args = parser.parse_args()
+
+    results = {}
+    failed = []
+    with tempfile.TemporaryDirectory(prefix='benchmarks-') as work_dir:
+        for name in args.only.split(','):
+            output = os.path.join(work_dir, f"{name}.json")
+            command = [sys.executable, os.path.join(HERE, f"{name}.py"), '--output', output]
+            if args.quick:
+                command += BENCHMARKS[name]
+            print(f"Running {name}...", file=sys.stderr)
+            if subprocess.run(command).returncode != 0:
+                failed.append(name)
+                continue
+            with open(output) as f:
+                document = json.load(f)
+            results[name] = {'params': document['params'], 'results': document['results']}
+
+    document = {'environment': environment(), 'quick': args.quick, 'failed': failed, 'benchmarks': results}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(document, f, indent=2)
+            f.write('\n')
+    else:
+        json.dump(document, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    sys.exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""
+Save and stream throughput of StorageBackend for local and S3 storage.
+
+Times StorageBackend.save, reading a file back the way downloads do
+(get_file_stream in DOWNLOAD_CHUNK_SIZE reads), and save_many of small files.
+Local storage uses a temp directory. S3 uses --s3-url with the usual S3_* variables
+or, without it, an in-process moto server (pip install 'moto[server]'):
+
+    python benchmarks/storage_throughput.py --output storage.json
+    S3_ENDPOINT_URL=http://localhost:9000 S3_ACCESS_KEY=... S3_SECRET_KEY=... \\
+        python benchmarks/storage_throughput.py --backends s3 --s3-url s3://bench-bucket
+"""
+import io
+import os
+import time
+import uuid
+import socket
+import logging
+import argparse
+import tempfile
+import contextlib
+
+from common import emit, summarize
+from flask import Flask
+from werkzeug.datastructures import FileStorage
+from storage import StorageBackend
+from downloads import iter_file_range
+
+SIZE_SUFFIXES = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+
+def parse_size(text):
+    text = text.strip().upper()
+    if text[-1] in SIZE_SUFFIXES:
+        return int(float(text[:-1]) * SIZE_SUFFIXES[text[-1]])
+    return int(text)
+
+@contextlib.contextmanager
+def moto_s3():
+    """Start a local moto S3 server and point the S3_* variables at it"""
+    from moto.server import ThreadedMotoServer
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    server = ThreadedMotoServer(ip_address='127.0.0.1', port=port, verbose=False)
+    server.start()
+    os.environ.update({
+        'S3_ENDPOINT_URL': f'http://127.0.0.1:{port}',
+        'S3_ACCESS_KEY': 'benchmark',
+        'S3_SECRET_KEY': 'benchmark',
+    })
+    try:
+        yield 's3://benchmark'
+    finally:
+        server.stop()
+
+def _save(storage, data, filename):
+    storage.save(FileStorage(stream=io.BytesIO(data), filename=filename), filename)
+
+def _stream(storage, filename, size):
+    read = 0
+    for chunk in iter_file_range(storage, filename, 0, size):
+        read += len(chunk)
+    assert read == size, f"read {read} of {size} bytes"
+
+def run(storage, sizes, repeat, batch):
+    results = {}
+    for size in sizes:
+        data = os.urandom(size)
+        names = [f"bench/{uuid.uuid4().hex}" for _ in range(repeat)]
+        save_times = []
+        stream_times = []
+        for name in names:
+            start = time.perf_counter()
+            _save(storage, data, name)
+            save_times.append(time.perf_counter() - start)
+        for name in names:
+            start = time.perf_counter()
+            _stream(storage, name, size)
+            stream_times.append(time.perf_counter() - start)
+        storage.delete_many(names)
+
+        save = summarize(save_times)
+        stream = summarize(stream_times)
+        save['mb_per_s'] = round(size / 1024 ** 2 / (save['median_ms'] / 1000), 1)
+        stream['mb_per_s'] = round(size / 1024 ** 2 / (stream['median_ms'] / 1000), 1)
+        results[str(size)] = {'save': save, 'stream': stream}
+
+    # Many small files, as when an asset's featured image renditions are stored
+    small = os.urandom(64 * 1024)
+    batch_times = []
+    for _ in range(repeat):
+        names = [f"bench/{uuid.uuid4().hex}" for _ in range(batch)]
+        start = time.perf_counter()
+        storage.save_many([(FileStorage(stream=io.BytesIO(small), filename=name), name) for name in names])
+        batch_times.append(time.perf_counter() - start)
+        storage.delete_many(names)
+    results['save_many'] = dict(summarize(batch_times), files=batch, file_bytes=len(small))
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--backends', default='file,s3', help='Comma-separated subset of: file, s3')
+    parser.add_argument('--sizes', default='64K,1M,16M,128M', help='Comma-separated file sizes (K, M, G suffixes)')
+    parser.add_argument('--repeat', type=int, default=5, help='Files saved and streamed per size')
+    parser.add_argument('--batch', type=int, default=16, help='Files per save_many call')
+    parser.add_argument('--concurrency', type=int, default=8, help='StorageBackend max_concurrency')
+    parser.add_argument('--s3-url', help='Bucket to benchmark instead of a local moto server')
+    parser.add_argument('--output', help='Write the JSON results to this file instead of stdout')
+    args = parser.parse_args()
+    sizes = [parse_size(s) for s in args.sizes.split(',')]
+
+    app = Flask(__name__)
+    results = {}
+    with app.app_context():
+        for backend in args.backends.split(','):
+            with contextlib.ExitStack() as stack:
+                if backend == 'file':
+                    url = 'file://' + stack.enter_context(tempfile.TemporaryDirectory(prefix='storage-bench-'))
+                else:
+                    url = args.s3_url or stack.enter_context(moto_s3())
+                storage = StorageBackend(url, max_concurrency=args.concurrency)
+                if backend == 's3' and not args.s3_url:
+                    storage.fs.mkdir(storage.bucket)
+                results[backend] = run(storage, sizes, args.repeat, args.batch)
+
+    params = {'repeat': args.repeat, 'batch': args.batch, 'concurrency': args.concurrency,
+              's3': args.s3_url or ('moto' if 's3' in args.backends else None)}
+    emit('storage_throughput', params, results, args.output)
+
+if __name__ == '__main__':
+    main()
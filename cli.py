@@ -0,0 +1,107 @@
+import os
+import click
+from datetime import datetime, timedelta
+from flask import current_app
+from flask.cli import AppGroup
+from extensions import db, image_jobs
+from models import Asset, Blob, Upload, SANITIZER_VERSION
+from storage import blob_filename
+from tasks import STATUS_PROCESSING
+import search
+
+assets_cli = AppGroup('assets', help='Asset maintenance commands.')
+
+@assets_cli.command('process-pending')
+def process_pending():
+    """Convert featured images left in the processing state, e.g. after a restart."""
+    asset_ids = [row.id for row in db.session.query(Asset.id).filter_by(featured_image_status=STATUS_PROCESSING)]
+    for asset_id in asset_ids:
+        image_jobs.run(asset_id)
+    click.echo(f"Processed {len(asset_ids)} pending featured image(s)")
+
+@assets_cli.command('cleanup-uploads')
+@click.option('--max-age-hours', type=int, default=None, help='Defaults to UPLOAD_MAX_AGE_HOURS.')
+def cleanup_uploads(max_age_hours):
+    """Discard chunked uploads that were abandoned or never attached to an asset."""
+    if max_age_hours is None:
+        max_age_hours = current_app.config['UPLOAD_MAX_AGE_HOURS']
+    cutoff = datetime.utcnow() - timedelta(hours=max_age_hours)
+    storage = current_app.storage
+
+    discarded = 0
+    completed = []
+    for upload in Upload.query.filter(Upload.created_at < cutoff).all():
+        if upload.completed:
+            completed.append(upload)
+        else:
+            try:
+                storage.abort_multipart_upload(upload.filename, upload.storage_upload_id)
+            except Exception as e:
+                click.echo(f"Failed to discard upload {upload.id}: {e}", err=True)
+                continue
+        db.session.delete(upload)
+        discarded += 1
+    db.session.flush()
+
+    # Completed uploads hold blob references (older ones a file of their own); drop them
+    # once the upload rows are gone and delete whatever is no longer used
+    orphaned = [blob_filename(digest) for digest in Blob.release([u.blob_digest for u in completed if u.blob_digest])]
+    orphaned += [u.filename for u in completed if not u.blob_digest]
+    db.session.commit()
+    for filename in storage.delete_many(orphaned):
+        click.echo(f"Failed to delete {filename}", err=True)
+    click.echo(f"Discarded {discarded} stale upload(s)")
+
+@assets_cli.command('resanitize')
+@click.option('--batch-size', type=int, default=500, show_default=True)
+def resanitize(batch_size):
+    """Re-sanitize descriptions cleaned under an older HTML allow-list."""
+    stale = Asset.description_sanitizer.is_(None) | (Asset.description_sanitizer != SANITIZER_VERSION)
+    updated = 0
+    while True:
+        assets = Asset.query.filter(stale).order_by(Asset.id).limit(batch_size).all()
+        if not assets:
+            break
+        for asset in assets:
+            asset.set_description(asset.description)
+        db.session.commit()
+        updated += len(assets)
+    click.echo(f"Re-sanitized {updated} description(s)")
+
+@assets_cli.command('reindex')
+@click.option('--missing', is_flag=True, help='Only index assets not yet in the search index.')
+@click.option('--batch-size', type=int, default=500, show_default=True)
+def reindex(missing, batch_size):
+    """Rebuild the full-text search index."""
+    skip = search.indexed_asset_ids() if missing else set()
+    indexed = 0
+    last_id = 0
+    while True:
+        assets = Asset.query.filter(Asset.id > last_id).order_by(Asset.id).limit(batch_size).all()
+        if not assets:
+            break
+        for asset in assets:
+            if asset.id not in skip:
+                search.update_asset(asset)
+                indexed += 1
+        db.session.commit()
+        last_id = assets[-1].id
+    click.echo(f"Indexed {indexed} asset(s)")
+
+@assets_cli.command('import')
+@click.argument('source', type=click.Path(exists=True))
+@click.option('--batch-size', type=int, default=50, show_default=True, help='Assets committed per transaction.')
+@click.option('--workers', type=int, default=None, help='Image conversion processes. Defaults to the CPU count.')
+def import_assets(source, batch_size, workers):
+    """Bulk import assets from a directory tree or a CSV/JSON manifest.
+
+    A directory becomes one asset per subdirectory; a manifest has one asset per row.
+    Re-running the same import skips assets that were already imported.
+    """
+    from importer import Importer, iter_directory, iter_manifest
+
+    records = iter_directory(source) if os.path.isdir(source) else iter_manifest(source)
+    importer = Importer(batch_size=batch_size, workers=workers)
+    importer.run(records)
+    click.echo(f"Imported {importer.imported} asset(s), skipped {importer.skipped} already imported, "
+               f"{importer.failed} failed")
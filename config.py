@@ -15,6 +15,7 @@ class Config:
     # Storage configuration
     STORAGE_URL = os.environ.get('STORAGE_URL', 'file://' + os.path.join(BASE_DIR, 'static', 'uploads'))
     UPLOAD_FOLDER = os.path.join(BASE_DIR, 'static', 'uploads')  # Kept for backwards compatibility
+    STORAGE_CONCURRENCY = int(os.environ.get('STORAGE_CONCURRENCY', 8))  # Parallel transfers for batch operations
     
     # S3 Configuration (optional)
     S3_ACCESS_KEY = os.environ.get('S3_ACCESS_KEY')
@@ -22,8 +23,62 @@ class Config:
     S3_ENDPOINT_URL = os.environ.get('S3_ENDPOINT_URL')
     S3_PUBLIC_URL = os.environ.get('S3_PUBLIC_URL')
 
+    # Optional local read-through disk cache for S3 downloads, shared by all workers
+    STORAGE_CACHE_DIR = os.environ.get('STORAGE_CACHE_DIR')
+    STORAGE_CACHE_MAX_BYTES = int(os.environ.get('STORAGE_CACHE_MAX_BYTES', 10 * 1024 ** 3))
+
+    # Redirect S3 downloads to presigned bucket URLs instead of proxying them
+    S3_PRESIGNED_DOWNLOADS = os.environ.get('S3_PRESIGNED_DOWNLOADS', 'false').lower() == 'true'
+    S3_PRESIGNED_EXPIRY = int(os.environ.get('S3_PRESIGNED_EXPIRY', 300))  # seconds
+
+    # Featured image renditions (widths in pixels) generated for responsive srcset
+    IMAGE_RENDITION_WIDTHS = [int(w) for w in os.environ.get('IMAGE_RENDITION_WIDTHS', '256,512,1024').split(',') if w.strip()]
+
+    # Featured images are downscaled to fit IMAGE_MAX_DIMENSION pixels on either side;
+    # sources over IMAGE_MAX_PIXELS (all frames combined) are rejected as decompression bombs
+    IMAGE_MAX_DIMENSION = int(os.environ.get('IMAGE_MAX_DIMENSION', 4096))
+    IMAGE_MAX_PIXELS = int(os.environ.get('IMAGE_MAX_PIXELS', 64_000_000))
+
+    # Encoder settings for featured images: 'fast', 'balanced' or 'max' (see ENCODE_PROFILES).
+    # IMAGE_AVIF also stores AVIF copies, served to browsers that accept them, if Pillow
+    # can encode AVIF (otherwise a warning is logged and only WebP is stored).
+    IMAGE_ENCODE_PROFILE = os.environ.get('IMAGE_ENCODE_PROFILE', 'balanced')
+    IMAGE_AVIF = os.environ.get('IMAGE_AVIF', 'false').lower() == 'true'
+
+    # Browser cache lifetime of featured images served by /images/ (their names never change)
+    IMAGE_CACHE_MAX_AGE = int(os.environ.get('IMAGE_CACHE_MAX_AGE', 31536000))
+
+    # Download offloading for local storage: '' (serve via sendfile), 'x-accel-redirect' (nginx)
+    # or 'x-sendfile' (Apache/lighttpd). X_ACCEL_REDIRECT_PREFIX is the internal nginx location.
+    DOWNLOAD_OFFLOAD = os.environ.get('DOWNLOAD_OFFLOAD', '').lower()
+    X_ACCEL_REDIRECT_PREFIX = os.environ.get('X_ACCEL_REDIRECT_PREFIX', '/protected-uploads')
+
+    # Background featured image processing
+    # IMAGE_WORKERS=0 processes images synchronously within the request
+    IMAGE_WORKERS = int(os.environ.get('IMAGE_WORKERS', 2))
+    IMAGE_WORKER_TYPE = os.environ.get('IMAGE_WORKER_TYPE', 'process')  # 'process' or 'thread'
+    # Jobs only live in the process that queued them; conversions still pending after this
+    # long (e.g. their worker was recycled) are requeued by the gunicorn workers
+    IMAGE_JOB_STALE_SECONDS = int(os.environ.get('IMAGE_JOB_STALE_SECONDS', 900))
+
+    # Chunked uploads: part size in bytes (S3 requires at least 5 MiB) and how long
+    # unfinished uploads are kept before 'flask assets cleanup-uploads' removes them
+    UPLOAD_PART_SIZE = int(os.environ.get('UPLOAD_PART_SIZE', 8 * 1024 * 1024))
+    UPLOAD_MAX_AGE_HOURS = int(os.environ.get('UPLOAD_MAX_AGE_HOURS', 24))
+
+    # Gallery pagination
+    ASSETS_PER_PAGE = int(os.environ.get('ASSETS_PER_PAGE', 24))
+
+    # Prometheus metrics at /metrics (set PROMETHEUS_MULTIPROC_DIR to aggregate gunicorn workers)
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+
     # Logging configuration
-    LOGGING_LEVEL = os.environ.get('LOGGING_LEVEL', 'DEBUG' if os.environ.get('FLASK_ENV') != 'production' else 'INFO')
+    LOGGING_LEVEL = os.environ.get('LOGGING_LEVEL', 'INFO')
+
+    # Storage logs one summary record (duration and bytes; DEBUG for reads, INFO otherwise) per
+    # operation, for this fraction of operations; STORAGE_LOG_FILES adds DEBUG detail per file
+    STORAGE_LOG_SAMPLE_RATE = float(os.environ.get('STORAGE_LOG_SAMPLE_RATE', 1.0))
+    STORAGE_LOG_FILES = os.environ.get('STORAGE_LOG_FILES', 'false').lower() == 'true'
 
     @staticmethod
     def init_app(app):
@@ -34,7 +89,3 @@ class Config:
         if app.config['STORAGE_URL'].startswith('file://'):
             storage_path = app.config['STORAGE_URL'].replace('file://', '')
             os.makedirs(storage_path, exist_ok=True)
-
-        # Configure logging
-        import logging
-        logging.basicConfig(level=getattr(logging, app.config['LOGGING_LEVEL']))
@@ -0,0 +1,201 @@
+import os
+import time
+import uuid
+import hashlib
+import logging
+import threading
+from typing import BinaryIO, Optional
+from metrics import STORAGE_CACHE_LOOKUPS
+
+try:
+    import fcntl
+except ImportError:  # Windows has no flock; eviction is then only serialized per process
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+TEMP_PREFIX = '.tmp-'
+LOCK_FILENAME = '.lock'
+
+# Temp files older than this are leftovers from a crashed fill
+STALE_TEMP_SECONDS = 3600
+
+class DiskCache:
+    """
+    Size-bounded LRU cache of remote files on local disk.
+
+    Entries are filled atomically (written to a temp file, then renamed into place),
+    so gunicorn workers sharing the directory never see partial files. Recency is
+    tracked through each entry's mtime, which is bumped on every hit, and eviction
+    is serialized across processes with an flock on the cache directory.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        # Files larger than this are never cached, so one download can't flush the cache
+        self.max_entry_bytes = max_bytes // 4
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        return os.path.join(self.directory, digest[:2], digest)
+
+    def _count(self, hit: bool) -> None:
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        STORAGE_CACHE_LOOKUPS.labels('hit' if hit else 'miss').inc()
+
+    def stats(self) -> dict:
+        """Hit and miss counts for this process"""
+        with self._stats_lock:
+            return {'hits': self.hits, 'misses': self.misses}
+
+    def open(self, key: str) -> Optional[BinaryIO]:
+        """Open a cached entry for reading, or return None on a miss"""
+        path = self._path(key)
+        try:
+            f = open(path, 'rb')
+        except FileNotFoundError:
+            self._count(hit=False)
+            return None
+        try:
+            os.utime(path)  # Mark as recently used
+        except OSError:
+            pass
+        self._count(hit=True)
+        return f
+
+    def invalidate(self, key: str) -> None:
+        """Drop a cached entry, e.g. after the remote file was deleted"""
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def wrap(self, key: str, source: BinaryIO, size: Optional[int] = None) -> BinaryIO:
+        """
+        Wrap a remote stream so that reading it to the end also fills the cache.
+        Streams of unknown size or too large to cache are returned unchanged
+        """
+        if size is None or size > self.max_entry_bytes:
+            return source
+        return _FillingReader(self, key, source, size)
+
+    def _commit(self, temp_path: str, key: str) -> None:
+        path = self._path(key)
+        os.replace(temp_path, path)
+        self._evict()
+
+    def _evict(self) -> None:
+        """Remove least recently used entries until the cache fits in max_bytes"""
+        lock = None
+        if fcntl is not None:
+            lock = open(os.path.join(self.directory, LOCK_FILENAME), 'a')
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                # Another process is already evicting
+                lock.close()
+                return
+
+        try:
+            entries = []
+            total = 0
+            now = time.time()
+            for root, _, files in os.walk(self.directory):
+                for name in files:
+                    if name == LOCK_FILENAME:
+                        continue
+                    path = os.path.join(root, name)
+                    try:
+                        st = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    if name.startswith(TEMP_PREFIX):
+                        if now - st.st_mtime > STALE_TEMP_SECONDS:
+                            os.remove(path)
+                        continue
+                    entries.append((st.st_mtime, st.st_size, path))
+                    total += st.st_size
+
+            if total <= self.max_bytes:
+                return
+
+            # Evict down to 90% so every fill doesn't trigger another scan
+            target = self.max_bytes * 0.9
+            for _, size, path in sorted(entries):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+                if total <= target:
+                    break
+            logger.debug("Evicted disk cache entries, %d bytes remain", total)
+        finally:
+            if lock is not None:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+                lock.close()
+
+class _FillingReader:
+    """File-like reader that tees what it reads into a cache temp file"""
+
+    def __init__(self, cache: DiskCache, key: str, source: BinaryIO, size: int):
+        self._cache = cache
+        self._key = key
+        self._source = source
+        self._size = size
+        self._written = 0
+        directory = os.path.dirname(cache._path(key))
+        os.makedirs(directory, exist_ok=True)
+        self._temp_path = os.path.join(directory, f"{TEMP_PREFIX}{uuid.uuid4().hex}")
+        self._temp = open(self._temp_path, 'wb')
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._source.read(size)
+        if self._temp is not None:
+            self._temp.write(data)
+            self._written += len(data)
+            if self._written >= self._size:
+                # Whole remote file read: publish the complete copy
+                self._temp.close()
+                self._temp = None
+                try:
+                    self._cache._commit(self._temp_path, self._key)
+                except OSError as e:
+                    logger.warning("Failed to fill disk cache for %s: %s", self._key, e)
+        return data
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        # Anything but reading straight through makes the copy incomplete
+        self._abandon()
+        return self._source.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._source.tell()
+
+    def _abandon(self) -> None:
+        if self._temp is not None:
+            self._temp.close()
+            self._temp = None
+            try:
+                os.remove(self._temp_path)
+            except FileNotFoundError:
+                pass
+
+    def close(self) -> None:
+        self._abandon()
+        self._source.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
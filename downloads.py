@@ -0,0 +1,210 @@
+import os
+import uuid
+from datetime import datetime
+from urllib.parse import quote
+from flask import Response, current_app, request, send_file, stream_with_context
+from werkzeug.http import is_resource_modified
+from zip_stream import ZipMember, ZipStream
+from metrics import DOWNLOAD_BYTES, count_download
+
+# Size of the reads used to stream stored files to the client
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# Requests asking for more ranges than this get the whole file instead
+MAX_RANGES = 16
+
+def iter_file_range(storage, filename: str, start: int, length: int):
+    """Yield length bytes of a stored file, starting at byte offset start"""
+    stream = storage.get_file_stream(filename, offset=start, length=length)
+    remaining = length
+    try:
+        while remaining > 0:
+            chunk = stream.read(min(DOWNLOAD_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        stream.close()
+        # Counted once per range rather than per chunk; includes aborted downloads' partial bytes
+        DOWNLOAD_BYTES.labels('stream').inc(length - remaining)
+
+def resolve_ranges(requested, size: int):
+    """
+    Turn a parsed Range header into absolute (start, stop) byte ranges, stop exclusive.
+    Returns an empty list when none of the ranges is satisfiable
+    """
+    ranges = []
+    for start, stop in requested.ranges:
+        if start < 0:
+            # Suffix range: the last -start bytes
+            start, stop = max(size + start, 0), size
+        else:
+            stop = size if stop is None else min(stop, size)
+        if start < stop:
+            ranges.append((start, stop))
+    return ranges
+
+def _if_range_matches(etag: str, last_modified) -> bool:
+    """Whether an If-Range precondition (if any) still matches the stored file"""
+    if_range = request.if_range
+    if if_range.etag is not None:
+        return if_range.etag == etag
+    if if_range.date is not None:
+        return last_modified is not None and if_range.date >= last_modified.replace(microsecond=0)
+    return True
+
+def send_stored_file(storage, filename: str, download_name: str, mime_type: str,
+                     etag: str = None, size: int = None) -> Response:
+    """
+    Build a streaming download response for a stored file.
+    Supports conditional GETs (If-None-Match / If-Modified-Since), single and
+    multiple byte ranges (with If-Range), and always sends an exact Content-Length.
+    Whole local files go through sendfile, or X-Accel-Redirect / X-Sendfile when
+    DOWNLOAD_OFFLOAD is configured.
+    When both etag and size are known (blobs), storage is not asked for file details,
+    so a download served from the disk cache makes no request to S3 at all.
+    """
+    if etag and size is not None:
+        last_modified = None
+    else:
+        info = storage.info(filename)
+        size = info['size']
+        last_modified = info['last_modified']
+        etag = etag or info['etag']
+
+    headers = {
+        'Accept-Ranges': 'bytes',
+        'Content-Disposition': f'attachment; filename="{download_name}"',
+    }
+
+    def finish(response):
+        if etag:
+            response.set_etag(etag)
+        if last_modified:
+            response.last_modified = last_modified
+        return response
+
+    if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        return finish(Response(status=304, headers=headers))
+
+    # Local files can be handed to the front-end server, which then serves
+    # ranges itself and frees this worker straight away
+    local_path = storage.local_path(filename)
+    offload = current_app.config['DOWNLOAD_OFFLOAD']
+    if local_path and offload == 'x-accel-redirect':
+        response = Response(mimetype=mime_type, headers=headers)
+        prefix = current_app.config['X_ACCEL_REDIRECT_PREFIX'].rstrip('/')
+        response.headers['X-Accel-Redirect'] = f"{prefix}/{quote(filename)}"
+        count_download('offload', size)
+        return finish(response)
+    if local_path and offload == 'x-sendfile':
+        response = Response(mimetype=mime_type, headers=headers)
+        response.headers['X-Sendfile'] = local_path
+        count_download('offload', size)
+        return finish(response)
+
+    requested = request.range
+    if requested is None or requested.units != 'bytes' or len(requested.ranges) > MAX_RANGES \
+            or not _if_range_matches(etag, last_modified):
+        if local_path:
+            # Whole local file: send_file hands the open file to the WSGI server's
+            # file wrapper, which uses sendfile() where the server supports it
+            response = send_file(local_path, mimetype=mime_type, conditional=False, etag=False)
+            response.headers.update(headers)
+            count_download('sendfile', size)
+            return finish(response)
+        response = Response(
+            stream_with_context(iter_file_range(storage, filename, 0, size)),
+            mimetype=mime_type,
+            headers=headers
+        )
+        response.content_length = size
+        return finish(response)
+
+    ranges = resolve_ranges(requested, size)
+    if not ranges:
+        response = Response(status=416, headers=headers)
+        response.headers['Content-Range'] = f'bytes */{size}'
+        return finish(response)
+
+    if len(ranges) == 1:
+        start, stop = ranges[0]
+        response = Response(
+            stream_with_context(iter_file_range(storage, filename, start, stop - start)),
+            status=206,
+            mimetype=mime_type,
+            headers=headers
+        )
+        response.headers['Content-Range'] = f'bytes {start}-{stop - 1}/{size}'
+        response.content_length = stop - start
+        return finish(response)
+
+    # Multiple ranges: multipart/byteranges body, streamed part by part
+    boundary = uuid.uuid4().hex
+    parts = [
+        (
+            (
+                f"\r\n--{boundary}\r\nContent-Type: {mime_type}\r\n"
+                f"Content-Range: bytes {start}-{stop - 1}/{size}\r\n\r\n"
+            ).encode(),
+            start,
+            stop
+        )
+        for start, stop in ranges
+    ]
+    closing = f"\r\n--{boundary}--\r\n".encode()
+
+    def generate():
+        for part_header, start, stop in parts:
+            yield part_header
+            yield from iter_file_range(storage, filename, start, stop - start)
+        yield closing
+
+    response = Response(
+        stream_with_context(generate()),
+        status=206,
+        content_type=f'multipart/byteranges; boundary={boundary}',
+        headers=headers
+    )
+    response.content_length = sum(len(h) + stop - start for h, start, stop in parts) + len(closing)
+    return finish(response)
+
+def _unique_names(names):
+    """Rename duplicate archive member names to "name (2).ext", "name (3).ext", ..."""
+    seen = set()
+    for name in names:
+        candidate = name
+        stem, ext = os.path.splitext(name)
+        n = 2
+        while candidate.lower() in seen:
+            candidate = f"{stem} ({n}){ext}"
+            n += 1
+        seen.add(candidate.lower())
+        yield candidate
+
+def send_zip_bundle(storage, files, download_name: str, modified: datetime) -> Response:
+    """
+    Stream several stored files as one ZIP archive, built on the fly.
+    files is a list of (filename, archive_name, size). Members are stored
+    uncompressed and read one chunk at a time, so memory use is constant and
+    the exact Content-Length is sent up front.
+    """
+    names = _unique_names(archive_name for _, archive_name, _ in files)
+    archive = ZipStream([
+        ZipMember(
+            name=name,
+            size=size,
+            modified=modified,
+            read=lambda filename=filename, size=size: iter_file_range(storage, filename, 0, size)
+        )
+        for (filename, _, size), name in zip(files, names)
+    ])
+
+    response = Response(
+        stream_with_context(iter(archive)),
+        mimetype='application/zip',
+        headers={'Content-Disposition': f'attachment; filename="{download_name}"'}
+    )
+    response.content_length = len(archive)
+    return response
@@ -26,8 +26,23 @@ check_required_vars "FLASK_APP" "FLASK_ENV" "STORAGE_URL"
 # Apply database migrations
 flask db upgrade
 
-# Start gunicorn with proper environment handling
-exec gunicorn --bind 0.0.0.0:5000 \
+# Re-sanitize descriptions if the HTML allow-list changed
+flask assets resanitize
+
+# Index assets created before full-text search existed
+flask assets reindex --missing
+
+# Convert featured images whose background job was lost when the previous container stopped
+flask assets process-pending
+
+# Metrics of all gunicorn workers are aggregated through this directory;
+# samples left over from the previous run must not be counted again
+export PROMETHEUS_MULTIPROC_DIR=${PROMETHEUS_MULTIPROC_DIR:-/tmp/prometheus-metrics}
+rm -rf "${PROMETHEUS_MULTIPROC_DIR}"
+mkdir -p "${PROMETHEUS_MULTIPROC_DIR}"
+
+# Start gunicorn with the production profile (workers, threads, timeouts) from gunicorn.conf.py
+exec gunicorn --config gunicorn.conf.py \
     --env FLASK_APP=${FLASK_APP} \
     --env FLASK_ENV=${FLASK_ENV} \
     --env STORAGE_URL=${STORAGE_URL} \
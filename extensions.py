@@ -1,5 +1,7 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
+from tasks import ImageJobQueue
 
 db = SQLAlchemy()
 migrate = Migrate()
+image_jobs = ImageJobQueue()
@@ -0,0 +1,63 @@
+"""
+Production gunicorn settings, picked up automatically when gunicorn starts in this
+directory (see entrypoint.sh). Every setting can be overridden with the environment
+variable named next to it.
+
+Threaded workers keep serving while other threads stream large downloads, and the app
+is preloaded in the master so workers fork from one warm copy of it.
+"""
+import os
+import multiprocessing
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+
+# gthread: each worker runs a pool of threads, so a slow client holds a thread rather
+# than the whole worker. Downloads mostly wait on the network or storage, which
+# releases the GIL. 'gevent' also works if installed
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+
+# For threaded workers this only bounds a stuck worker's heartbeat, not the length of
+# a request, so multi-gigabyte downloads are not cut off
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+# Recycle workers now and then to return memory that image decoding leaves fragmented;
+# the jitter keeps them from all restarting together
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 100))
+
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() == 'true'
+
+# Heartbeat files on tmpfs; a disk-backed /tmp in a container can stall the heartbeat
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG') or None
+
+def post_fork(server, worker):
+    """
+    Drop everything the worker inherited from the preloaded master that must not be
+    shared across processes: storage clients (s3fs sessions and transfer pools), image
+    job pools and pooled database connections. Each worker then also watches for image
+    jobs lost when another worker was recycled
+    """
+    from app import app, init_storage
+    from extensions import db, image_jobs
+    from storage import reset_storage
+
+    reset_storage()
+    init_storage(app)
+    image_jobs.reset()
+    with app.app_context():
+        # Leave the parent's connections open for the parent; just stop using them here
+        db.engine.dispose(close=False)
+    image_jobs.start_sweeper()
+
+def child_exit(server, worker):
+    """Drop the exited worker's live gauge samples from the shared metrics directory"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -1,95 +1,275 @@
 import os
-from PIL import Image
+import tempfile
+from PIL import Image, features
 from wand.image import Image as WandImage
-import io
-from typing import BinaryIO, Tuple, Optional
+from typing import BinaryIO, List, Tuple
+from metrics import IMAGE_SECONDS
+
+try:
+    # Registers an AVIF encoder on Pillow versions without built-in support
+    import pillow_avif  # noqa: F401
+except ImportError:
+    pass
+
+# Sources with more pixels than this (summed over all frames for animations)
+# are rejected before anything is decoded
+MAX_IMAGE_PIXELS = 64_000_000
+
+# Sources are downscaled to fit within this many pixels on either side
+MAX_IMAGE_DIMENSION = 4096
+
+# Encoded images larger than this are spooled to a temp file instead of kept in memory
+SPOOL_MAX_BYTES = 4 * 1024 * 1024
+
+# Pixel cache ImageMagick may keep in memory for animations before spilling to disk
+WAND_MEMORY_LIMIT = 256 * 1024 * 1024
+
+# Named encoder settings, trading upload CPU for output size.
+# 'max' matches what every image was encoded with before profiles existed.
+ENCODE_PROFILES = {
+    'fast': {
+        'quality': 80,
+        'rendition_quality': 75,
+        'method': 2,                  # WebP effort, 0 (fastest) to 6 (smallest)
+        'animated_lossless': False,
+        'animated_quality': 75,
+        'animated_method': 1,
+        'avif_quality': 60,
+        'avif_speed': 9,              # AVIF effort, 10 (fastest) to 0 (smallest)
+    },
+    'balanced': {
+        'quality': 85,
+        'rendition_quality': 80,
+        'method': 4,
+        'animated_lossless': False,
+        'animated_quality': 85,
+        'animated_method': 4,
+        'avif_quality': 65,
+        'avif_speed': 7,
+    },
+    'max': {
+        'quality': 90,
+        'rendition_quality': 85,
+        'method': 6,
+        'animated_lossless': True,
+        'animated_quality': 100,
+        'animated_method': 6,
+        'avif_quality': 70,
+        'avif_speed': 4,
+    },
+}
+
+def rendition_filename(filename: str, width: int) -> str:
+    """Deterministic name of a resized rendition stored alongside the original"""
+    stem, ext = os.path.splitext(filename)
+    return f"{stem}_{width}w{ext}"
+
+def avif_filename(filename: str) -> str:
+    """Name of the AVIF variant stored alongside a WebP image or rendition"""
+    return f"{os.path.splitext(filename)[0]}.avif"
+
+def avif_supported() -> bool:
+    """Whether Pillow can encode AVIF, natively or through pillow-avif-plugin"""
+    return features.check('avif') or 'AVIF' in Image.SAVE
+
+def fit_size(width: int, height: int, max_dimension: int) -> Tuple[int, int]:
+    """Size of a width x height image scaled down (never up) to fit max_dimension"""
+    scale = min(1.0, max_dimension / max(width, height))
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+def check_pixels(width: int, height: int, frames: int = 1, max_pixels: int = MAX_IMAGE_PIXELS) -> None:
+    """Raise DecompressionBombError if an image is too large to decode safely"""
+    pixels = width * height * frames
+    if pixels > max_pixels:
+        raise Image.DecompressionBombError(
+            f"Image has {pixels} pixels, more than the limit of {max_pixels}"
+        )
+
+def spooled_output() -> BinaryIO:
+    """File object for encoded output that moves to disk once it grows large"""
+    return tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+
+def check_image(stream: BinaryIO, max_pixels: int = MAX_IMAGE_PIXELS) -> None:
+    """
+    Check that an upload is an image within max_pixels, reading only its headers.
+    Raises UnidentifiedImageError or DecompressionBombError; the stream position is kept
+    """
+    pos = stream.tell()
+    stream.seek(0)
+    try:
+        with Image.open(stream) as img:
+            check_pixels(img.width, img.height, getattr(img, 'n_frames', 1), max_pixels)
+    finally:
+        stream.seek(pos)
+
+def is_animated(img: Image.Image) -> bool:
+    """Whether an opened image has more than one frame (only the second frame header is read)"""
+    return getattr(img, 'is_animated', False)
 
 class ImageProcessor:
     @staticmethod
-    def is_animated_gif(file_storage) -> bool:
-        """Check if the image is an animated GIF"""
-        try:
-            # Save current position
-            pos = file_storage.tell()
-            # Go to beginning
-            file_storage.seek(0)
-            
-            with Image.open(file_storage) as img:
-                try:
-                    img.seek(1)  # Try to move to the second frame
-                    is_animated = True
-                except EOFError:
-                    is_animated = False
-            
-            # Restore position
-            file_storage.seek(pos)
-            return is_animated
-        except Exception:
-            # Restore position in case of error
-            file_storage.seek(pos)
-            return False
+    def load_bounded(img: Image.Image, max_dimension: int = MAX_IMAGE_DIMENSION,
+                     max_pixels: int = MAX_IMAGE_PIXELS) -> Image.Image:
+        """
+        Decode an opened static image no larger than max_dimension on either side, as RGB.
+        The pixel limit is checked from the header before decoding. JPEGs at least twice
+        the target size are decoded straight at a reduced scale and other formats are
+        reduced by an integer factor first, so the full-size image is never resampled.
+        """
+        check_pixels(img.width, img.height, max_pixels=max_pixels)
+        with IMAGE_SECONDS.labels('decode', img.format or 'unknown').time():
+            # thumbnail() alone only drafts sources over reducing_gap times the target,
+            # which leaves nearly every JPEG under the pixel limit decoded at full size
+            img.draft(None, fit_size(img.width, img.height, max_dimension))
+            img.thumbnail((max_dimension, max_dimension), Image.LANCZOS, reducing_gap=3.0)
+            return ImageProcessor.flatten(img)
+
+    @staticmethod
+    def flatten(img: Image.Image) -> Image.Image:
+        """Convert an image to RGB, compositing any transparency onto white"""
+        if img.mode in ('RGBA', 'LA'):
+            background = Image.new('RGB', img.size, (255, 255, 255))
+            background.paste(img, mask=img.getchannel('A'))
+            return background
+        if img.mode != 'RGB':
+            return img.convert('RGB')
+        return img
+
+    @staticmethod
+    def convert_animated_to_webp(file_storage, profile: str = 'max', max_dimension: int = MAX_IMAGE_DIMENSION,
+                                 max_pixels: int = MAX_IMAGE_PIXELS) -> BinaryIO:
+        """Convert an animated image to animated WebP, spooling the output"""
+        settings = ENCODE_PROFILES[profile]
+
+        # Let ImageMagick keep only a bounded pixel cache in memory; the rest goes to disk
+        from wand.resource import limits
+        limits['memory'] = WAND_MEMORY_LIMIT
+
+        with IMAGE_SECONDS.labels('animated', 'WEBP').time(), WandImage(file=file_storage) as img:
+            # process_image has already checked the frame count from the headers; direct
+            # callers only get this check once ImageMagick has read the file
+            check_pixels(img.width, img.height, len(img.sequence), max_pixels)
+            if max(img.width, img.height) > max_dimension:
+                img.coalesce()
+                img.resize(*fit_size(img.width, img.height, max_dimension))
+
+            # Configure WebP animation settings
+            img.format = 'WEBP'
+
+            # Lossless keeps flat-colour animations crisp; lossy is far cheaper to encode
+            img.options['webp:lossless'] = 'true' if settings['animated_lossless'] else 'false'
+            img.options['webp:method'] = str(settings['animated_method'])
+            img.options['webp:image-hint'] = 'graph'  # Better for animations
+            img.options['webp:minimize-size'] = 'false'  # Prioritize quality
+            img.compression_quality = settings['animated_quality']
+
+            # Animation specific settings
+            img.options['webp:animation-type'] = 'default'
+            img.options['webp:loop'] = '0'  # Infinite loop
+
+            output = spooled_output()
+            img.save(file=output)
+            output.seek(0)
+            return output
+
+    @staticmethod
+    def encode(img: Image.Image, image_format: str, quality: int, settings: dict) -> BinaryIO:
+        """Encode a decoded RGB image as WEBP or AVIF, spooling the output"""
+        output = spooled_output()
+        with IMAGE_SECONDS.labels('encode', image_format).time():
+            if image_format == 'AVIF':
+                img.save(output, format='AVIF', quality=settings['avif_quality'], speed=settings['avif_speed'])
+            else:
+                img.save(output,
+                       format='WEBP',
+                       quality=quality,
+                       method=settings['method'],
+                       lossless=False,       # Use lossy for static images
+                       exact=True)           # Preserve color exactness
+        output.seek(0)
+        return output
 
     @staticmethod
-    def convert_to_webp(file_storage, quality: int = 90) -> Tuple[BinaryIO, str]:
+    def encode_renditions(img: Image.Image, widths: List[int], settings: dict,
+                          formats: Tuple[str, ...] = ('WEBP',)) -> List[Tuple[int, str, BinaryIO]]:
         """
-        Convert an image to WebP format.
-        Returns a tuple of (file_object, extension)
+        Encode downscaled renditions of a decoded RGB image, in each of formats,
+        for each width smaller than it. Returns [(width, format, file_object), ...], smallest first
         """
+        renditions = []
+        # Resize from largest to smallest so each step works on a smaller source
+        for width in sorted((w for w in set(widths) if w < img.width), reverse=True):
+            height = max(1, round(img.height * width / img.width))
+            img = img.resize((width, height), Image.LANCZOS)
+            for image_format in formats:
+                output = ImageProcessor.encode(img, image_format, settings['rendition_quality'], settings)
+                renditions.append((width, image_format, output))
+
+        renditions.reverse()
+        return renditions
+
+    @staticmethod
+    def process_image(file_storage, widths: List[int] = (), profile: str = 'max', avif: bool = False,
+                      max_dimension: int = MAX_IMAGE_DIMENSION,
+                      max_pixels: int = MAX_IMAGE_PIXELS) -> dict:
+        """
+        Convert an image to WebP, downscaled to fit max_dimension, plus renditions for widths,
+        using the named encode profile. With avif set, static images also get an AVIF copy
+        of the image and of every rendition.
+        The source is opened and parsed once: static images are decoded a single time and
+        the renditions are resized from that decode, while animations are handed straight
+        to ImageMagick and get no renditions.
+        Raises DecompressionBombError for images over max_pixels.
+        Returns a dict with 'image' (file object), 'ext', 'width', 'avif' (file object or None)
+        and 'renditions' ([(width, format, file_object), ...])
+        """
+        settings = ENCODE_PROFILES[profile]
+
         # Save current position
         pos = file_storage.tell()
         # Go to beginning
         file_storage.seek(0)
 
         try:
-            # Check if it's an animated GIF
-            if ImageProcessor.is_animated_gif(file_storage):
-                # Convert animated GIF to animated WebP
-                file_storage.seek(0)
-                with WandImage(file=file_storage) as img:
-                    # Configure WebP animation settings
-                    img.format = 'WEBP'
-                    
-                    # Higher quality settings for animation
-                    img.options['webp:lossless'] = 'true'  # Use lossless for animations
-                    img.options['webp:method'] = '6'       # Best compression method
-                    img.options['webp:image-hint'] = 'graph'  # Better for animations
-                    img.options['webp:minimize-size'] = 'false'  # Prioritize quality
-                    
-                    # Animation specific settings
-                    img.options['webp:animation-type'] = 'default'
-                    img.options['webp:loop'] = '0'  # Infinite loop
-                    
-                    # Save with high quality
-                    webp_bytes = io.BytesIO(img.make_blob(format='webp'))
-                    webp_bytes.seek(0)
-                    return webp_bytes, '.webp'
-            else:
-                # Handle static images
-                file_storage.seek(0)
-                with Image.open(file_storage) as img:
-                    # Convert RGBA to RGB if necessary
-                    if img.mode in ('RGBA', 'LA'):
-                        background = Image.new('RGB', img.size, (255, 255, 255))
-                        background.paste(img, mask=img.getchannel('A'))
-                        img = background
-                    elif img.mode != 'RGB':
-                        img = img.convert('RGB')
-
-                    # Save as WebP with high quality
-                    output = io.BytesIO()
-                    img.save(output, 
-                           format='WEBP', 
-                           quality=quality,      # Higher quality
-                           method=6,             # Best compression method
-                           lossless=False,       # Use lossy for static images
-                           exact=True)           # Preserve color exactness
-                    output.seek(0)
-                    return output, '.webp'
+            with Image.open(file_storage) as source:
+                if not is_animated(source):
+                    # Handle static images
+                    img = ImageProcessor.load_bounded(source, max_dimension, max_pixels)
+                    formats = ('WEBP', 'AVIF') if avif else ('WEBP',)
+                    return {
+                        'image': ImageProcessor.encode(img, 'WEBP', settings['quality'], settings),
+                        'ext': '.webp',
+                        'width': img.width,
+                        'avif': ImageProcessor.encode(img, 'AVIF', settings['quality'], settings) if avif else None,
+                        'renditions': ImageProcessor.encode_renditions(img, widths, settings, formats),
+                    }
+                # Count frames from their headers so oversized animations are rejected
+                # before ImageMagick decodes every frame
+                check_pixels(source.width, source.height, getattr(source, 'n_frames', 1), max_pixels)
+                width = fit_size(source.width, source.height, max_dimension)[0]
+
+            # Convert animations to animated WebP from the buffer already read
+            file_storage.seek(0)
+            output = ImageProcessor.convert_animated_to_webp(file_storage, profile, max_dimension, max_pixels)
+            return {'image': output, 'ext': '.webp', 'width': width, 'avif': None, 'renditions': []}
         finally:
             # Restore original position
             file_storage.seek(pos)
 
     @staticmethod
-    def process_featured_image(file_storage) -> Tuple[BinaryIO, str]:
-        """Process featured image, converting to WebP format"""
-        return ImageProcessor.convert_to_webp(file_storage, quality=90) 
\ No newline at end of file
+    def convert_to_webp(file_storage, profile: str = 'max', max_dimension: int = MAX_IMAGE_DIMENSION,
+                        max_pixels: int = MAX_IMAGE_PIXELS) -> Tuple[BinaryIO, str]:
+        """
+        Convert an image to WebP format, downscaled to fit max_dimension.
+        Returns a tuple of (file_object, extension); large outputs are spooled to disk
+        """
+        result = ImageProcessor.process_image(file_storage, profile=profile, max_dimension=max_dimension,
+                                              max_pixels=max_pixels)
+        return result['image'], result['ext']
+
+    @staticmethod
+    def process_featured_image(file_storage, widths: List[int] = (), profile: str = 'max', avif: bool = False,
+                               max_dimension: int = MAX_IMAGE_DIMENSION,
+                               max_pixels: int = MAX_IMAGE_PIXELS) -> dict:
+        """Process featured image, converting to WebP (and optionally AVIF) with renditions"""
+        return ImageProcessor.process_image(file_storage, widths, profile, avif, max_dimension, max_pixels)
@@ -0,0 +1,255 @@
+import os
+import csv
+import json
+import uuid
+import shutil
+import hashlib
+import logging
+import tempfile
+from typing import Iterator, List, Optional
+from flask import current_app
+from werkzeug.datastructures import FileStorage
+from werkzeug.utils import secure_filename
+from extensions import db
+from models import Asset, AssetFile, Blob
+from storage import blob_filename, HASH_CHUNK_SIZE
+from image_processor import rendition_filename, avif_filename
+from tasks import convert_featured_image, avif_enabled, process_pool, CONTENT_TYPES, STATUS_READY
+import search
+
+logger = logging.getLogger(__name__)
+
+FEATURED_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.gif', '.webp'}
+DESCRIPTION_FILENAMES = ('description.html', 'description.txt')
+
+def iter_directory(root: str) -> Iterator[dict]:
+    """
+    Import records for a directory tree: every subdirectory of root holding files is one
+    asset, titled after the directory. Its featured image is the image named 'featured.*',
+    or else the first image; description.html / description.txt become the description
+    """
+    from app import allowed_file
+
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        if dirpath == root or not filenames:
+            continue
+        filenames = sorted(f for f in filenames if not f.startswith('.'))
+
+        description = None
+        for name in DESCRIPTION_FILENAMES:
+            if name in filenames:
+                with open(os.path.join(dirpath, name), encoding='utf-8') as f:
+                    description = f.read()
+                filenames.remove(name)
+                break
+
+        images = [f for f in filenames if os.path.splitext(f)[1].lower() in FEATURED_EXTENSIONS]
+        featured = next((f for f in images if os.path.splitext(f)[0].lower() == 'featured'), None)
+        featured = featured or (images[0] if images else None)
+
+        yield {
+            'key': os.path.relpath(dirpath, root),
+            'title': os.path.basename(dirpath),
+            'description': description,
+            'license_key': None,
+            'featured_image': os.path.join(dirpath, featured) if featured else None,
+            'files': [
+                os.path.join(dirpath, f) for f in filenames
+                if f != featured and allowed_file(f)
+            ],
+        }
+
+def iter_manifest(path: str) -> Iterator[dict]:
+    """
+    Import records from a CSV or JSON manifest with title, description, license_key,
+    featured_image and files columns (files separated by ';' in CSV). Paths are relative
+    to the manifest. An optional key column identifies rows for resuming; it defaults
+    to the featured image path
+    """
+    base = os.path.dirname(os.path.abspath(path))
+    if path.lower().endswith('.json'):
+        with open(path, encoding='utf-8') as f:
+            rows = json.load(f)
+    else:
+        with open(path, newline='', encoding='utf-8') as f:
+            rows = list(csv.DictReader(f))
+
+    for row in rows:
+        files = row.get('files') or []
+        if isinstance(files, str):
+            files = [name.strip() for name in files.split(';') if name.strip()]
+        featured = row.get('featured_image') or None
+        yield {
+            'key': str(row.get('key') or featured or row.get('title')),
+            'title': row.get('title'),
+            'description': row.get('description') or None,
+            'license_key': (row.get('license_key') or '').strip() or None,
+            'featured_image': os.path.join(base, featured) if featured else None,
+            'files': [os.path.join(base, name) for name in files],
+        }
+
+def _hash_file(path: str):
+    hasher = hashlib.sha256()
+    size = 0
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(HASH_CHUNK_SIZE)
+            if not chunk:
+                break
+            hasher.update(chunk)
+            size += len(chunk)
+    return hasher.hexdigest(), size
+
+def prepare_record(record: dict, work_dir: str, image_settings: dict) -> dict:
+    """
+    CPU-bound half of importing one record: convert its featured image into work_dir
+    and hash its files. Runs in a worker process
+    """
+    converted = convert_featured_image(record['featured_image'], work_dir, **image_settings)
+    return {
+        'converted': converted,
+        'files': [(path,) + _hash_file(path) for path in record['files']],
+    }
+
+class Importer:
+    """
+    Imports records in batches. Featured image conversion and hashing run on a process
+    pool one batch ahead of the uploads, uploads go through StorageBackend.save_many, and
+    each batch is committed in one transaction together with the records' import keys,
+    so re-running after a crash skips everything already committed.
+    """
+
+    def __init__(self, batch_size: int = 50, workers: Optional[int] = None):
+        self.batch_size = batch_size
+        self.workers = workers or os.cpu_count()
+        self.storage = current_app.storage
+        config = current_app.config
+        self.image_settings = {
+            'widths': config['IMAGE_RENDITION_WIDTHS'],
+            'profile': config['IMAGE_ENCODE_PROFILE'],
+            'avif': avif_enabled(config),
+            'max_dimension': config['IMAGE_MAX_DIMENSION'],
+            'max_pixels': config['IMAGE_MAX_PIXELS'],
+        }
+        self.imported = 0
+        self.skipped = 0
+        self.failed = 0
+        self._seen = set()
+
+    def _pending(self, records: Iterator[dict]) -> Iterator[List[dict]]:
+        """Non-empty batches of records that have not been imported yet"""
+        batch = []
+        for record in records:
+            if not record['title'] or not record['featured_image']:
+                logger.warning("Skipping %s: a title and featured image are required", record['key'])
+                self.failed += 1
+                continue
+            batch.append(record)
+            if len(batch) == self.batch_size:
+                pending = self._filter_imported(batch)
+                if pending:
+                    yield pending
+                batch = []
+        if batch:
+            pending = self._filter_imported(batch)
+            if pending:
+                yield pending
+
+    def _filter_imported(self, batch: List[dict]) -> List[dict]:
+        keys = [record['key'] for record in batch]
+        done = {key for key, in db.session.query(Asset.import_key).filter(Asset.import_key.in_(keys))}
+        pending = []
+        for record in batch:
+            if record['key'] in done or record['key'] in self._seen:
+                self.skipped += 1
+                continue
+            self._seen.add(record['key'])
+            pending.append(record)
+        return pending
+
+    def run(self, records: Iterator[dict]) -> None:
+        with tempfile.TemporaryDirectory(prefix='asset-import-') as work_root, \
+                process_pool(self.workers) as pool:
+
+            def submit(batch):
+                futures = []
+                for record in batch:
+                    work_dir = tempfile.mkdtemp(dir=work_root)
+                    futures.append((record, work_dir, pool.submit(prepare_record, record, work_dir, self.image_settings)))
+                return futures
+
+            batches = self._pending(records)
+            current = submit(next(batches, []))
+            while current:
+                # Keep the pool busy converting the next batch while this one uploads
+                upcoming = submit(next(batches, []))
+                self._import_batch(current)
+                current = upcoming
+
+    def _import_batch(self, futures) -> None:
+        uploads = []
+        opened = []
+        imported = 0
+        try:
+            for record, work_dir, future in futures:
+                try:
+                    prepared = future.result()
+                except Exception as e:
+                    logger.error("Failed to prepare %s: %s", record['key'], e)
+                    self.failed += 1
+                    continue
+
+                converted = prepared['converted']
+                filename = f"{uuid.uuid4().hex}{converted['ext']}"
+                for width, image_format, path in converted['outputs']:
+                    name = filename if width is None else rendition_filename(filename, width)
+                    if image_format == 'AVIF':
+                        name = avif_filename(name)
+                    stream = open(path, 'rb')
+                    opened.append(stream)
+                    uploads.append((FileStorage(stream=stream, filename=name, content_type=CONTENT_TYPES[image_format]), name))
+
+                asset = Asset(
+                    title=record['title'],
+                    license_key=record['license_key'],
+                    import_key=record['key'],
+                    featured_image=filename,
+                    original_featured_image=secure_filename(os.path.basename(record['featured_image'])),
+                    featured_image_width=converted['width'],
+                    featured_image_renditions=','.join(str(w) for w in converted['renditions']) or None,
+                    featured_image_avif=converted['avif'],
+                    featured_image_status=STATUS_READY
+                )
+                asset.set_description(record['description'])
+                db.session.add(asset)
+                db.session.flush()
+
+                for path, digest, size in prepared['files']:
+                    name = blob_filename(digest)
+                    if Blob.acquire(digest, size):
+                        stream = open(path, 'rb')
+                        opened.append(stream)
+                        uploads.append((FileStorage(stream=stream, filename=name), name))
+                    db.session.add(AssetFile(
+                        filename=name,
+                        original_filename=secure_filename(os.path.basename(path)),
+                        asset_id=asset.id,
+                        blob_digest=digest
+                    ))
+                search.update_asset(asset)
+                imported += 1
+
+            self.storage.save_many(uploads)
+            db.session.commit()
+            self.imported += imported
+        except Exception:
+            db.session.rollback()
+            # Includes blobs written before a failed transfer, which save_many does not report
+            self.storage.delete_many([name for _, name in uploads])
+            raise
+        finally:
+            for stream in opened:
+                stream.close()
+            for _, work_dir, _ in futures:
+                shutil.rmtree(work_dir, ignore_errors=True)
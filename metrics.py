@@ -0,0 +1,93 @@
+import os
+import time
+from flask import Response, g, has_request_context, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# With PROMETHEUS_MULTIPROC_DIR set (see entrypoint.sh), every gunicorn worker and image
+# worker process writes its samples there and /metrics aggregates them all; without it
+# only the serving process is reported
+MULTIPROCESS = bool(os.environ.get('PROMETHEUS_MULTIPROC_DIR'))
+
+# Buckets in seconds, from a local metadata lookup to a large S3 upload or AVIF encode
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+REQUEST_SECONDS = Histogram(
+    'http_request_duration_seconds',
+    'Time until the response was ready to send (streamed bodies excluded)',
+    ['endpoint', 'method', 'status'], buckets=LATENCY_BUCKETS
+)
+REQUEST_QUERIES = Histogram(
+    'http_request_db_queries',
+    'Database queries issued while handling a request',
+    ['endpoint'], buckets=QUERY_COUNT_BUCKETS
+)
+IMAGE_SECONDS = Histogram(
+    'image_processing_seconds',
+    'Featured image decode and encode time',
+    ['stage', 'format'], buckets=LATENCY_BUCKETS
+)
+STORAGE_SECONDS = Histogram(
+    'storage_operation_seconds',
+    'StorageBackend operation latency',
+    ['operation', 'protocol'], buckets=LATENCY_BUCKETS
+)
+STORAGE_ERRORS = Counter(
+    'storage_operation_errors_total',
+    'StorageBackend operations that failed',
+    ['operation', 'protocol']
+)
+STORAGE_CACHE_LOOKUPS = Counter(
+    'storage_cache_lookups_total',
+    'Disk cache lookups for S3 downloads',
+    ['result']
+)
+DOWNLOAD_BYTES = Counter(
+    'download_bytes_total',
+    'Bytes sent by file downloads, by how they were sent (offloaded ones count the whole file)',
+    ['method']
+)
+
+def count_download(method: str, size: int) -> None:
+    """Count bytes sent by the WSGI server or front-end proxy rather than streamed by us"""
+    DOWNLOAD_BYTES.labels(method).inc(size)
+
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'db_queries' in g:
+        g.db_queries += 1
+
+def _start_request():
+    g.request_started = time.perf_counter()
+    g.db_queries = 0
+
+def _finish_request(response):
+    started = g.pop('request_started', None)
+    if started is None:
+        return response
+    endpoint = request.endpoint or 'none'
+    REQUEST_SECONDS.labels(endpoint, request.method, response.status_code) \
+        .observe(time.perf_counter() - started)
+    REQUEST_QUERIES.labels(endpoint).observe(g.pop('db_queries', 0))
+    return response
+
+def metrics_view():
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
+
+def init_app(app):
+    """Time requests, count their queries and expose everything at /metrics"""
+    if not app.config['METRICS_ENABLED']:
+        return
+    if not event.contains(Engine, 'before_cursor_execute', _count_query):
+        event.listen(Engine, 'before_cursor_execute', _count_query)
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
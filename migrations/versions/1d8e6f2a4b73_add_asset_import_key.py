@@ -0,0 +1,28 @@
+"""Add asset import key
+
+Revision ID: 1d8e6f2a4b73
+Revises: f2b7c4e1a960
+Create Date: 2026-10-17 21:03:51.662094
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1d8e6f2a4b73'
+down_revision = 'f2b7c4e1a960'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('asset', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('import_key', sa.String(length=255), nullable=True))
+        batch_op.create_unique_constraint('uq_asset_import_key', ['import_key'])
+
+
+def downgrade():
+    with op.batch_alter_table('asset', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_asset_import_key', type_='unique')
+        batch_op.drop_column('import_key')
@@ -0,0 +1,26 @@
+"""Add composite index for gallery pagination
+
+Revision ID: 3f9c2d7b1a4e
+Revises: ac1b5e061bd9
+Create Date: 2026-10-17 09:12:31.482913
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9c2d7b1a4e'
+down_revision = 'ac1b5e061bd9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('asset', schema=None) as batch_op:
+        batch_op.create_index('ix_asset_created_at_id', ['created_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('asset', schema=None) as batch_op:
+        batch_op.drop_index('ix_asset_created_at_id')
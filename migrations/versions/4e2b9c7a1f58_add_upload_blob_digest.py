@@ -0,0 +1,28 @@
+"""Add blob digest to chunked uploads
+
+Revision ID: 4e2b9c7a1f58
+Revises: 7a4c1e9d3b62
+Create Date: 2026-10-18 10:47:05.926114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4e2b9c7a1f58'
+down_revision = '7a4c1e9d3b62'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('upload', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('blob_digest', sa.String(length=64), nullable=True))
+        batch_op.create_foreign_key('fk_upload_blob_digest_blob', 'blob', ['blob_digest'], ['digest'])
+
+
+def downgrade():
+    with op.batch_alter_table('upload', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_upload_blob_digest_blob', type_='foreignkey')
+        batch_op.drop_column('blob_digest')
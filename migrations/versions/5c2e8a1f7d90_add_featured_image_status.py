@@ -0,0 +1,26 @@
+"""Add featured image processing status
+
+Revision ID: 5c2e8a1f7d90
+Revises: d41a7c9e2b58
+Create Date: 2026-10-17 13:45:19.274561
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c2e8a1f7d90'
+down_revision = 'd41a7c9e2b58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('asset', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('featured_image_status', sa.String(length=20), nullable=True, server_default='ready'))
+
+
+def downgrade():
+    with op.batch_alter_table('asset', schema=None) as batch_op:
+        batch_op.drop_column('featured_image_status')
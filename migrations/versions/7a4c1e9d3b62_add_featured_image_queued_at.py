@@ -0,0 +1,28 @@
+"""Add featured image queued time
+
+Revision ID: 7a4c1e9d3b62
+Revises: 1d8e6f2a4b73
+Create Date: 2026-10-18 09:12:40.318527
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7a4c1e9d3b62'
+down_revision = '1d8e6f2a4b73'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('asset', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('featured_image_queued_at', sa.DateTime(), nullable=True))
+        batch_op.create_index('ix_asset_featured_image_status', ['featured_image_status'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('asset', schema=None) as batch_op:
+        batch_op.drop_index('ix_asset_featured_image_status')
+        batch_op.drop_column('featured_image_queued_at')
@@ -0,0 +1,26 @@
+"""Index asset_file.asset_id
+
+Revision ID: 8b5e0f3c6d21
+Revises: 3f9c2d7b1a4e
+Create Date: 2026-10-17 10:04:52.117306
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b5e0f3c6d21'
+down_revision = '3f9c2d7b1a4e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('asset_file', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_asset_file_asset_id'), ['asset_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('asset_file', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_asset_file_asset_id'))
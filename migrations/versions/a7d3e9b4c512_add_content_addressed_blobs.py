@@ -0,0 +1,38 @@
+"""Add content-addressed blobs for asset files
+
+Revision ID: a7d3e9b4c512
+Revises: 5c2e8a1f7d90
+Create Date: 2026-10-17 15:02:44.905187
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7d3e9b4c512'
+down_revision = '5c2e8a1f7d90'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('blob',
+    sa.Column('digest', sa.String(length=64), nullable=False),
+    sa.Column('size', sa.BigInteger(), nullable=False),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('digest')
+    )
+    with op.batch_alter_table('asset_file', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('blob_digest', sa.String(length=64), nullable=True))
+        batch_op.create_index(batch_op.f('ix_asset_file_blob_digest'), ['blob_digest'], unique=False)
+        batch_op.create_foreign_key('fk_asset_file_blob_digest_blob', 'blob', ['blob_digest'], ['digest'])
+
+
+def downgrade():
+    with op.batch_alter_table('asset_file', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_asset_file_blob_digest_blob', type_='foreignkey')
+        batch_op.drop_index(batch_op.f('ix_asset_file_blob_digest'))
+        batch_op.drop_column('blob_digest')
+
+    op.drop_table('blob')
@@ -0,0 +1,26 @@
+"""Add description sanitizer version stamp
+
+Revision ID: b93f0d6a2e15
+Revises: e6f1b2c83d47
+Create Date: 2026-10-17 18:11:27.309652
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b93f0d6a2e15'
+down_revision = 'e6f1b2c83d47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('asset', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('description_sanitizer', sa.String(length=16), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('asset', schema=None) as batch_op:
+        batch_op.drop_column('description_sanitizer')
@@ -0,0 +1,44 @@
+"""Add full-text search index
+
+Revision ID: c58a4d1e9f03
+Revises: b93f0d6a2e15
+Create Date: 2026-10-17 19:02:44.518230
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c58a4d1e9f03'
+down_revision = 'b93f0d6a2e15'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The index is filled by `flask assets reindex --missing`, run from the entrypoint
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE asset_search USING fts5("
+            "title, description, filenames, tokenize='unicode61 remove_diacritics 2')"
+        )
+    elif dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import TSVECTOR
+        op.create_table('asset_search',
+        sa.Column('asset_id', sa.Integer(), nullable=False),
+        sa.Column('document', TSVECTOR(), nullable=False),
+        sa.ForeignKeyConstraint(['asset_id'], ['asset.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('asset_id')
+        )
+        op.create_index('ix_asset_search_document', 'asset_search', ['document'], unique=False, postgresql_using='gin')
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute("DROP TABLE asset_search")
+    elif dialect == 'postgresql':
+        op.drop_index('ix_asset_search_document', table_name='asset_search', postgresql_using='gin')
+        op.drop_table('asset_search')
@@ -0,0 +1,28 @@
+"""Add featured image rendition columns
+
+Revision ID: d41a7c9e2b58
+Revises: 8b5e0f3c6d21
+Create Date: 2026-10-17 11:27:08.630194
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd41a7c9e2b58'
+down_revision = '8b5e0f3c6d21'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('asset', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('featured_image_width', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('featured_image_renditions', sa.String(length=100), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('asset', schema=None) as batch_op:
+        batch_op.drop_column('featured_image_renditions')
+        batch_op.drop_column('featured_image_width')
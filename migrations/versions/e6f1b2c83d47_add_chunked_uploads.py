@@ -0,0 +1,42 @@
+"""Add resumable chunked uploads
+
+Revision ID: e6f1b2c83d47
+Revises: a7d3e9b4c512
+Create Date: 2026-10-17 16:38:05.771420
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6f1b2c83d47'
+down_revision = 'a7d3e9b4c512'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('upload',
+    sa.Column('id', sa.String(length=32), nullable=False),
+    sa.Column('filename', sa.String(length=200), nullable=False),
+    sa.Column('original_filename', sa.String(length=200), nullable=True),
+    sa.Column('size', sa.BigInteger(), nullable=False),
+    sa.Column('part_size', sa.Integer(), nullable=False),
+    sa.Column('storage_upload_id', sa.String(length=255), nullable=True),
+    sa.Column('completed', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('upload_part',
+    sa.Column('upload_id', sa.String(length=32), nullable=False),
+    sa.Column('part_number', sa.Integer(), nullable=False),
+    sa.Column('etag', sa.String(length=100), nullable=False),
+    sa.ForeignKeyConstraint(['upload_id'], ['upload.id'], ),
+    sa.PrimaryKeyConstraint('upload_id', 'part_number')
+    )
+
+
+def downgrade():
+    op.drop_table('upload_part')
+    op.drop_table('upload')
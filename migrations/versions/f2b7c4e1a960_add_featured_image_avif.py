@@ -0,0 +1,26 @@
+"""Add featured image AVIF flag
+
+Revision ID: f2b7c4e1a960
+Revises: c58a4d1e9f03
+Create Date: 2026-10-17 20:14:05.734118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2b7c4e1a960'
+down_revision = 'c58a4d1e9f03'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('asset', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('featured_image_avif', sa.Boolean(), nullable=False, server_default=sa.false()))
+
+
+def downgrade():
+    with op.batch_alter_table('asset', schema=None) as batch_op:
+        batch_op.drop_column('featured_image_avif')
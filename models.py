@@ -1,7 +1,12 @@
+import hashlib
+from collections import Counter
 from datetime import datetime
 from extensions import db
+from sqlalchemy import delete, func, select
+from sqlalchemy.exc import IntegrityError
 import bleach
-from flask import current_app
+from flask import current_app, url_for
+from image_processor import rendition_filename, avif_filename
 
 ALLOWED_TAGS = [
     'a', 'abbr', 'acronym', 'b', 'blockquote', 'code', 'em', 'i', 'li', 'ol',
@@ -15,59 +20,213 @@ ALLOWED_ATTRIBUTES = {
     'img': ['src', 'alt', 'width', 'height'],
 }
 
+# Stamp identifying the allow-list a description was sanitized with; changes whenever
+# ALLOWED_TAGS, ALLOWED_ATTRIBUTES or bleach itself change
+SANITIZER_VERSION = hashlib.sha256(repr((
+    sorted(ALLOWED_TAGS),
+    sorted((tag, sorted(attrs)) for tag, attrs in ALLOWED_ATTRIBUTES.items()),
+    bleach.__version__
+)).encode()).hexdigest()[:16]
+
+def sanitize_html(html):
+    """Clean user supplied HTML against the allow-list"""
+    return bleach.clean(
+        html,
+        tags=ALLOWED_TAGS,
+        attributes=ALLOWED_ATTRIBUTES,
+        strip=True
+    )
+
 class Asset(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text)
+    description_sanitizer = db.Column(db.String(16))  # SANITIZER_VERSION the description was cleaned with
     featured_image = db.Column(db.String(200))
     original_featured_image = db.Column(db.String(200))
+    featured_image_width = db.Column(db.Integer)
+    featured_image_renditions = db.Column(db.String(100))  # Comma-separated rendition widths
+    featured_image_status = db.Column(db.String(20), default='ready', index=True)  # processing, ready or failed
+    featured_image_queued_at = db.Column(db.DateTime)  # When the pending conversion was (re)queued
+    featured_image_avif = db.Column(db.Boolean, nullable=False, default=False)  # AVIF copies stored alongside
     license_key = db.Column(db.String(255))
+    import_key = db.Column(db.String(255), unique=True)  # Source record of assets created by 'flask assets import'
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     files = db.relationship('AssetFile', backref='asset', lazy=True)
 
+    __table_args__ = (
+        # Supports keyset pagination of the gallery on (created_at, id)
+        db.Index('ix_asset_created_at_id', 'created_at', 'id'),
+    )
+
     def set_description(self, description):
         """Sanitize HTML content before saving"""
         if description:
-            clean_html = bleach.clean(
-                description,
-                tags=ALLOWED_TAGS,
-                attributes=ALLOWED_ATTRIBUTES,
-                strip=True
-            )
-            self.description = clean_html
+            self.description = sanitize_html(description)
         else:
             self.description = None
+        self.description_sanitizer = SANITIZER_VERSION
 
     @property
     def safe_description(self):
-        """Return sanitized HTML content"""
-        if self.description:
-            return bleach.clean(
-                self.description,
-                tags=ALLOWED_TAGS,
-                attributes=ALLOWED_ATTRIBUTES,
-                strip=True
-            )
-        return ''
+        """
+        Return sanitized HTML content. Descriptions are cleaned on write, so this only
+        re-runs bleach for rows sanitized under an older allow-list
+        """
+        if not self.description:
+            return ''
+        if self.description_sanitizer == SANITIZER_VERSION:
+            return self.description
+        return sanitize_html(self.description)
     
+    def image_url(self, filename):
+        """
+        URL of one featured image file. Local images go through the image route for
+        immutable caching headers, as do S3 images with AVIF copies so each browser
+        gets the best format it accepts; other S3 images are linked directly
+        """
+        storage = current_app.storage
+        if self.featured_image_avif or storage.local_path(filename) is not None:
+            return url_for('featured_image', filename=filename)
+        return storage.url_for(filename)
+
     @property
     def featured_image_url(self):
         """Get the URL for the featured image"""
-        from storage import StorageBackend
         if self.featured_image:
-            storage = StorageBackend(current_app.config['STORAGE_URL'])
-            return storage.url_for(self.featured_image)
+            return self.image_url(self.featured_image)
         return None
 
+    @property
+    def rendition_widths(self):
+        """Widths of the stored featured image renditions, smallest first"""
+        if not self.featured_image_renditions:
+            return []
+        return [int(w) for w in self.featured_image_renditions.split(',')]
+
+    @property
+    def featured_image_files(self):
+        """All stored files backing the featured image, including renditions"""
+        if not self.featured_image:
+            return []
+        files = [self.featured_image] + [
+            rendition_filename(self.featured_image, w) for w in self.rendition_widths
+        ]
+        if self.featured_image_avif:
+            files += [avif_filename(f) for f in files]
+        return files
+
+    @property
+    def featured_image_srcset(self):
+        """srcset attribute value for the featured image, or None if there are no renditions"""
+        if not self.featured_image or not self.rendition_widths:
+            return None
+        candidates = [
+            f"{self.image_url(rendition_filename(self.featured_image, w))} {w}w"
+            for w in self.rendition_widths
+        ]
+        if self.featured_image_width:
+            candidates.append(f"{self.image_url(self.featured_image)} {self.featured_image_width}w")
+        return ', '.join(candidates)
+
+class Blob(db.Model):
+    """Content-addressed file shared by every AssetFile with the same content"""
+    digest = db.Column(db.String(64), primary_key=True)  # SHA-256 hex digest
+    size = db.Column(db.BigInteger, nullable=False)
+    ref_count = db.Column(db.Integer, nullable=False, default=0)
+
+    @classmethod
+    def acquire(cls, digest, size):
+        """
+        Take a reference to a blob, creating its row if needed.
+        Returns True if the blob is new and its content must be stored
+        """
+        updated = cls.query.filter_by(digest=digest).update(
+            {cls.ref_count: cls.ref_count + 1}, synchronize_session=False
+        )
+        if updated:
+            return False
+        try:
+            with db.session.begin_nested():
+                db.session.add(cls(digest=digest, size=size, ref_count=1))
+            return True
+        except IntegrityError:
+            # Another request created the blob concurrently
+            cls.query.filter_by(digest=digest).update(
+                {cls.ref_count: cls.ref_count + 1}, synchronize_session=False
+            )
+            return False
+
+    @classmethod
+    def release(cls, digests):
+        """
+        Drop one reference per digest and delete rows that are no longer referenced.
+        Digests are released in bulk, with one update per distinct reference count.
+        Returns the digests whose stored content can now be removed
+        """
+        by_count = {}
+        for digest, count in Counter(digests).items():
+            by_count.setdefault(count, []).append(digest)
+        for count, group in by_count.items():
+            cls.query.filter(cls.digest.in_(group)).update(
+                {cls.ref_count: cls.ref_count - count}, synchronize_session=False
+            )
+        if not by_count:
+            return []
+        deleted = db.session.execute(
+            delete(cls).where(cls.digest.in_(set(digests)), cls.ref_count <= 0).returning(cls.digest),
+            execution_options={'synchronize_session': False}
+        )
+        return [digest for digest, in deleted]
+
 class AssetFile(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     filename = db.Column(db.String(200), nullable=False)
     original_filename = db.Column(db.String(200))
-    asset_id = db.Column(db.Integer, db.ForeignKey('asset.id'), nullable=False)
+    asset_id = db.Column(db.Integer, db.ForeignKey('asset.id'), nullable=False, index=True)
+    blob_digest = db.Column(db.String(64), db.ForeignKey('blob.digest'), index=True)  # None for legacy uploads
 
     @property
     def file_url(self):
         """Get the URL for the file"""
-        from storage import StorageBackend
-        storage = StorageBackend(current_app.config['STORAGE_URL'])
-        return storage.url_for(self.filename)
+        return current_app.storage.url_for(self.filename)
+
+class Upload(db.Model):
+    """Resumable chunked upload, written part by part straight to storage"""
+    id = db.Column(db.String(32), primary_key=True)
+    filename = db.Column(db.String(200), nullable=False)  # Storage name the parts are written to
+    original_filename = db.Column(db.String(200))
+    size = db.Column(db.BigInteger, nullable=False)
+    part_size = db.Column(db.Integer, nullable=False)
+    storage_upload_id = db.Column(db.String(255))  # S3 multipart upload id, None for local storage
+    completed = db.Column(db.Boolean, nullable=False, default=False)
+    # Set on completion; the upload holds a reference to the blob until attached or discarded
+    blob_digest = db.Column(db.String(64), db.ForeignKey('blob.digest'))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    parts = db.relationship('UploadPart', backref='upload', lazy=True,
+                            cascade='all, delete-orphan', order_by='UploadPart.part_number')
+
+    @property
+    def total_parts(self):
+        return max(1, -(-self.size // self.part_size))
+
+    def part_length(self, part_number):
+        """Expected length of a part; only the last one may be short"""
+        if part_number < self.total_parts:
+            return self.part_size
+        return self.size - self.part_size * (self.total_parts - 1)
+
+class UploadPart(db.Model):
+    upload_id = db.Column(db.String(32), db.ForeignKey('upload.id'), primary_key=True)
+    part_number = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    etag = db.Column(db.String(100), nullable=False)
+
+# Number of files attached to an asset, computed in SQL so listings don't load AssetFile rows.
+# Deferred by default; listings opt in with undefer(Asset.file_count).
+Asset.file_count = db.column_property(
+    select(func.count(AssetFile.id))
+    .where(AssetFile.asset_id == Asset.id)
+    .correlate_except(AssetFile)
+    .scalar_subquery(),
+    deferred=True
+)
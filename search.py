@@ -0,0 +1,114 @@
+import re
+import html
+import bleach
+from sqlalchemy import text
+from extensions import db
+from models import Asset, AssetFile
+
+# Name of the full-text index table (an FTS5 virtual table on SQLite, a tsvector table on Postgres)
+SEARCH_TABLE = 'asset_search'
+
+# Column weights for ranking: title, description, file names
+SQLITE_WEIGHTS = (10.0, 1.0, 4.0)
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+def include_object(obj, name, type_, reflected, compare_to):
+    """Keep Alembic autogenerate from dropping the search table and its FTS5 shadow tables"""
+    return not (type_ == 'table' and name.startswith(SEARCH_TABLE))
+
+def description_text(description):
+    """Plain text of an HTML description, for indexing"""
+    if not description:
+        return ''
+    return html.unescape(bleach.clean(description, tags=[], strip=True))
+
+def _dialect():
+    return db.session.get_bind().dialect.name
+
+def _tokens(query):
+    return _TOKEN_RE.findall(query.lower())[:20]
+
+def update_asset(asset):
+    """
+    (Re)index one asset in the current transaction.
+    Call this after changing an asset's title, description or files
+    """
+    filenames = ' '.join(
+        name or '' for name, in
+        db.session.query(AssetFile.original_filename).filter_by(asset_id=asset.id)
+    )
+    params = {
+        'id': asset.id,
+        'title': asset.title or '',
+        'description': description_text(asset.description),
+        'filenames': filenames
+    }
+    dialect = _dialect()
+    if dialect == 'sqlite':
+        db.session.execute(text(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = :id"), {'id': asset.id})
+        db.session.execute(text(
+            f"INSERT INTO {SEARCH_TABLE} (rowid, title, description, filenames) "
+            "VALUES (:id, :title, :description, :filenames)"
+        ), params)
+    elif dialect == 'postgresql':
+        db.session.execute(text(
+            f"INSERT INTO {SEARCH_TABLE} (asset_id, document) VALUES (:id, "
+            "setweight(to_tsvector('simple', :title), 'A') || "
+            "setweight(to_tsvector('simple', :filenames), 'B') || "
+            "setweight(to_tsvector('simple', :description), 'C')) "
+            "ON CONFLICT (asset_id) DO UPDATE SET document = EXCLUDED.document"
+        ), params)
+
+def remove_asset(asset_id):
+    """Drop an asset from the index in the current transaction"""
+    dialect = _dialect()
+    if dialect == 'sqlite':
+        db.session.execute(text(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = :id"), {'id': asset_id})
+    elif dialect == 'postgresql':
+        db.session.execute(text(f"DELETE FROM {SEARCH_TABLE} WHERE asset_id = :id"), {'id': asset_id})
+
+def search_asset_ids(query, page=1, per_page=24):
+    """
+    Find assets matching every word of query (as prefixes), best matches first.
+    Returns a tuple of (asset_ids for the page, whether another page exists)
+    """
+    tokens = _tokens(query)
+    if not tokens:
+        return [], False
+
+    limit = per_page + 1
+    offset = (max(page, 1) - 1) * per_page
+    dialect = _dialect()
+
+    if dialect == 'sqlite':
+        match = ' '.join(f'"{token}"*' for token in tokens)
+        weights = ', '.join(str(w) for w in SQLITE_WEIGHTS)
+        rows = db.session.execute(text(
+            f"SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH :match "
+            f"ORDER BY bm25({SEARCH_TABLE}, {weights}) LIMIT :limit OFFSET :offset"
+        ), {'match': match, 'limit': limit, 'offset': offset})
+    elif dialect == 'postgresql':
+        tsquery = ' & '.join(f"{token}:*" for token in tokens)
+        rows = db.session.execute(text(
+            f"SELECT asset_id FROM {SEARCH_TABLE}, to_tsquery('simple', :tsquery) query "
+            "WHERE document @@ query ORDER BY ts_rank(document, query) DESC, asset_id DESC "
+            "LIMIT :limit OFFSET :offset"
+        ), {'tsquery': tsquery, 'limit': limit, 'offset': offset})
+    else:
+        # No full-text support: fall back to matching titles
+        filters = [Asset.title.ilike(f"%{token}%") for token in tokens]
+        rows = db.session.query(Asset.id).filter(*filters).order_by(Asset.id.desc()) \
+            .limit(limit).offset(offset)
+
+    ids = [row[0] for row in rows]
+    return ids[:per_page], len(ids) > per_page
+
+def indexed_asset_ids():
+    """Ids of every asset currently in the index"""
+    dialect = _dialect()
+    if dialect == 'sqlite':
+        return {row[0] for row in db.session.execute(text(f"SELECT rowid FROM {SEARCH_TABLE}"))}
+    if dialect == 'postgresql':
+        return {row[0] for row in db.session.execute(text(f"SELECT asset_id FROM {SEARCH_TABLE}"))}
+    return set()
@@ -1,23 +1,136 @@
 import os
+import random
+import hashlib
 import fsspec
+from fsspec.asyn import sync
 import logging
 import asyncio
-from typing import BinaryIO, Optional, Union
+import time
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import BinaryIO, Dict, List, Optional, Tuple, Union
 from urllib.parse import urlparse
-from flask import current_app, url_for
+from flask import current_app, url_for, request, has_request_context
 from werkzeug.datastructures import FileStorage
+from disk_cache import DiskCache
+from metrics import STORAGE_ERRORS, STORAGE_SECONDS
+
+# Upper bound on memoized filename -> URL entries per backend
+URL_CACHE_SIZE = 10000
+
+# S3 DeleteObjects accepts at most 1000 keys per request
+S3_DELETE_BATCH_SIZE = 1000
+
+# Stored names are never reused (UUIDs and content digests), so objects can be cached forever
+OBJECT_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# Operations whose summary records are logged at DEBUG rather than INFO; they run on
+# every download and gallery render, so INFO would be mostly read-path noise
+READ_OPERATIONS = {'open', 'info'}
+
+# Content-addressed blobs are stored as blobs/<first two hex chars>/<sha256>
+BLOB_PREFIX = 'blobs'
+HASH_CHUNK_SIZE = 1024 * 1024
+
+def blob_filename(digest: str) -> str:
+    """Storage name of a content-addressed blob"""
+    return f"{BLOB_PREFIX}/{digest[:2]}/{digest}"
+
+_registry: Dict[str, 'StorageBackend'] = {}
+_registry_lock = threading.Lock()
+
+def get_storage(storage_url: str, max_concurrency: int = 8, cache_dir: Optional[str] = None,
+                cache_max_bytes: int = 0, log_files: bool = False,
+                log_sample_rate: float = 1.0) -> 'StorageBackend':
+    """
+    Return the shared StorageBackend for a storage URL, creating it on first use.
+    Backends are process-wide so the filesystem is only configured once.
+    """
+    storage = _registry.get(storage_url)
+    if storage is None:
+        with _registry_lock:
+            storage = _registry.get(storage_url)
+            if storage is None:
+                storage = StorageBackend(storage_url, max_concurrency=max_concurrency,
+                                         cache_dir=cache_dir, cache_max_bytes=cache_max_bytes,
+                                         log_files=log_files, log_sample_rate=log_sample_rate)
+                _registry[storage_url] = storage
+    return storage
+
+def reset_storage() -> None:
+    """
+    Forget every shared backend, e.g. in a freshly forked worker, so the next
+    get_storage call builds new filesystem clients instead of the parent's
+    """
+    with _registry_lock:
+        for storage in _registry.values():
+            storage.reset()
+        _registry.clear()
+
+class S3ObjectReader:
+    """
+    Read-only file object over one GetObject response, optionally for a byte range.
+    The body is read a chunk at a time on the s3fs event loop, so an open download makes
+    a single request and holds only the chunk being read, unlike s3fs files, which
+    fetch and keep whole read-ahead blocks (50 MiB by default)
+    """
+
+    def __init__(self, fs, bucket: str, key: str, offset: int = 0, length: Optional[int] = None):
+        params = {'Bucket': bucket, 'Key': key}
+        if length is not None and length > 0:
+            params['Range'] = f"bytes={offset}-{offset + length - 1}"
+        elif offset:
+            params['Range'] = f"bytes={offset}-"
+        response = fs.call_s3('get_object', **params)
+        self._loop = fs.loop
+        self._body = response['Body']
+        # Size of the whole object, when the response carries all of it
+        self.size = response['ContentLength'] if 'Range' not in params else None
+        self.closed = False
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            return sync(self._loop, self._body.read)
+        return sync(self._loop, self._body.read, size)
+
+    def readable(self) -> bool:
+        return True
+
+    def close(self) -> None:
+        if not self.closed:
+            self.closed = True
+            self._body.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
 
 class StorageBackend:
-    def __init__(self, storage_url: str):
+    def __init__(self, storage_url: str, max_concurrency: int = 8, cache_dir: Optional[str] = None,
+                 cache_max_bytes: int = 0, log_files: bool = False, log_sample_rate: float = 1.0):
         """
         Initialize storage backend with a URL.
         Examples:
             - file:///path/to/storage (local filesystem)
             - s3://bucket-name/path (S3 compatible)
+        max_concurrency bounds the parallel transfers of the batch operations.
+        cache_dir enables a local read-through disk cache (S3 only) of up to cache_max_bytes.
+        Each operation logs one summary record (DEBUG for reads, INFO otherwise) for a
+        log_sample_rate fraction of operations; log_files adds DEBUG detail about every file.
         """
         self.storage_url = storage_url
+        self.max_concurrency = max(1, max_concurrency)
+        self._executor = None
+        self._executor_lock = threading.Lock()
         self.parsed_url = urlparse(storage_url)
         self.protocol = self.parsed_url.scheme or 'file'
+        self.log_files = log_files
+        self.log_sample_rate = log_sample_rate
         
         # Set up logging - use Flask logger if in app context, otherwise use Python logging
         try:
@@ -26,7 +139,7 @@ class StorageBackend:
         except RuntimeError:
             self.logger = logging.getLogger(__name__)
         
-        self.logger.info(f"Initializing StorageBackend with URL: {storage_url}, protocol: {self.protocol}")
+        self.logger.info("Initializing StorageBackend with URL: %s, protocol: %s", storage_url, self.protocol)
         
         # Configure filesystem
         if self.protocol == 's3':
@@ -41,77 +154,297 @@ class StorageBackend:
             )
             self.bucket = self.parsed_url.netloc
             self.base_path = self.parsed_url.path.lstrip('/')
-            self.logger.debug(f"Configured S3 storage with bucket: {self.bucket}, base_path: {self.base_path}")
+            self.logger.debug("Configured S3 storage with bucket: %s, base_path: %s", self.bucket, self.base_path)
+
+            self.cache = None
+            if cache_dir and cache_max_bytes > 0:
+                self.cache = DiskCache(cache_dir, cache_max_bytes)
+                self.logger.info("Enabled S3 read-through disk cache at %s (%d bytes)", cache_dir, cache_max_bytes)
         else:
             self.fs = fsspec.filesystem('file')
+            self.cache = None  # Local files are already on disk
             self.base_path = self.parsed_url.path or '/uploads'
-            self.logger.debug(f"Configured local storage with base_path: {self.base_path}")
+            self.logger.debug("Configured local storage with base_path: %s", self.base_path)
+
+        # Memoized url_for results, keyed by (script_root, filename)
+        self._url_cache = OrderedDict()
+        self._url_cache_lock = threading.Lock()
+
+    @contextmanager
+    def _operation(self, operation: str, filename: Optional[str] = None):
+        """
+        Time one storage operation for metrics (counting it as failed if it raises) and
+        log a single summary record for it. The block may set 'bytes' on the yielded dict
+        """
+        details = {'bytes': None}
+        start = time.perf_counter()
+        try:
+            yield details
+        except Exception:
+            STORAGE_ERRORS.labels(operation, self.protocol).inc()
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            STORAGE_SECONDS.labels(operation, self.protocol).observe(duration)
+
+        level = logging.DEBUG if operation in READ_OPERATIONS else logging.INFO
+        if not self.logger.isEnabledFor(level):
+            return
+        if self.log_sample_rate < 1 and random.random() >= self.log_sample_rate:
+            return
+        message = "Storage %s of %s took %.1f ms"
+        args = [operation, filename, duration * 1000]
+        if details['bytes'] is not None:
+            message += ", %d bytes"
+            args.append(details['bytes'])
+        self.logger.log(
+            level, message, *args,
+            extra={'storage_operation': operation, 'storage_protocol': self.protocol, 'storage_filename': filename,
+                   'storage_bytes': details['bytes'], 'duration_ms': round(duration * 1000, 3)}
+        )
+
+    def _log_file(self, message: str, *args) -> None:
+        """Per-file DEBUG detail, only emitted with log_files on"""
+        if self.log_files and self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(message, *args)
 
     def _get_full_path(self, filename: str) -> str:
         """Get full path for a file"""
         if self.protocol == 's3':
-            full_path = os.path.join(self.base_path, filename)
-            self.logger.debug(f"Generated S3 full path: {full_path}")
-            return full_path
-        
-        full_path = os.path.join(current_app.root_path, self.base_path, filename)
-        self.logger.debug(f"Generated local full path: {full_path}")
-        return full_path
+            return os.path.join(self.base_path, filename)
+        return os.path.join(current_app.root_path, self.base_path, filename)
 
     def save(self, file_storage: FileStorage, filename: str) -> str:
         """Save a file to storage"""
         try:
-            full_path = self._get_full_path(filename)
-            self.logger.info(f"Attempting to save file {filename} to {full_path}")
+            with self._operation('save', filename) as details:
+                full_path = self._get_full_path(filename)
+                self._log_file("Saving file %s to %s", filename, full_path)
             
-            if not isinstance(file_storage, FileStorage):
-                self.logger.error(f"Invalid file_storage object type: {type(file_storage)}")
-                raise ValueError("file_storage must be a FileStorage object")
+                if not isinstance(file_storage, FileStorage):
+                    self.logger.error("Invalid file_storage object type: %s", type(file_storage))
+                    raise ValueError("file_storage must be a FileStorage object")
             
-            if self.protocol == 's3':
-                s3_path = f"{self.bucket}/{full_path}"
-                self.logger.debug(f"Opening S3 file for writing: {s3_path}")
-                with self.fs.open(s3_path, 'wb') as f:
-                    self.logger.debug("Saving file content to S3...")
-                    file_storage.save(f)
-                
-                # Verify the file was saved
-                if self.fs.exists(s3_path):
-                    self.logger.info(f"Successfully saved file to S3: {s3_path}")
-                else:
-                    self.logger.error(f"Failed to verify file existence in S3: {s3_path}")
-                    raise RuntimeError(f"Failed to verify file existence in S3: {s3_path}")
-                
-                return f"s3://{self.bucket}/{full_path}"
-            else:
-                # Create directory structure if it doesn't exist
-                dir_path = os.path.dirname(full_path)
-                self.logger.debug(f"Creating local directory structure: {dir_path}")
-                os.makedirs(dir_path, exist_ok=True)
-                
-                self.logger.debug(f"Saving file to local path: {full_path}")
-                file_storage.save(full_path)
-                
-                # Verify the file was saved
-                if os.path.exists(full_path):
-                    self.logger.info(f"Successfully saved file locally: {full_path}")
-                    self.logger.debug(f"File size: {os.path.getsize(full_path)} bytes")
+                if self.protocol == 's3':
+                    s3_path = f"{self.bucket}/{full_path}"
+                    # Closing the file issues PutObject / CompleteMultipartUpload, which raise
+                    # on failure, so a clean exit is the verification; no extra HEAD request
+                    metadata = {'CacheControl': OBJECT_CACHE_CONTROL}
+                    if file_storage.mimetype:
+                        metadata['ContentType'] = file_storage.mimetype
+                    with self.fs.open(s3_path, 'wb', **metadata) as f:
+                        file_storage.save(f)
+                        written = f.tell()
+
+                    details['bytes'] = written
+                    return f"s3://{self.bucket}/{full_path}"
                 else:
-                    self.logger.error(f"Failed to verify file existence locally: {full_path}")
-                    raise RuntimeError(f"Failed to verify file existence locally: {full_path}")
-                
-                return f"file://{full_path}"
+                    # Create directory structure if it doesn't exist
+                    dir_path = os.path.dirname(full_path)
+                    os.makedirs(dir_path, exist_ok=True)
+
+                    with open(full_path, 'wb') as f:
+                        file_storage.save(f)
+                        f.flush()
+                        written = f.tell()
+                        # Verify against the open descriptor rather than looking the path up again
+                        stored = os.fstat(f.fileno()).st_size
+
+                    if stored != written:
+                        self.logger.error("Failed to verify local file %s: wrote %d bytes, stored %d",
+                                          full_path, written, stored)
+                        raise RuntimeError(f"Failed to verify local file: {full_path}")
+
+                    details['bytes'] = written
+                    return f"file://{full_path}"
                 
         except Exception as e:
-            self.logger.error(f"Error saving file {filename}: {str(e)}", exc_info=True)
+            self.logger.error("Error saving file %s: %s", filename, e, exc_info=True)
             raise
 
-    def open(self, filename: str, mode: str = 'rb') -> BinaryIO:
-        """Open a file from storage"""
+    def digest(self, file_storage: FileStorage) -> Tuple[str, int]:
+        """
+        Hash an upload with SHA-256 in a single pass, leaving the stream where it was.
+        Returns a tuple of (hex digest, size)
+        """
+        stream = file_storage.stream
+        start = stream.tell()
+        hasher = hashlib.sha256()
+        size = 0
+        while True:
+            chunk = stream.read(HASH_CHUNK_SIZE)
+            if not chunk:
+                break
+            hasher.update(chunk)
+            size += len(chunk)
+        stream.seek(start)
+        return hasher.hexdigest(), size
+
+    def digest_stored(self, filename: str) -> Tuple[str, int]:
+        """Hash a stored file with SHA-256, reading it back in chunks. Returns (hex digest, size)"""
+        hasher = hashlib.sha256()
+        size = 0
+        with self.open(filename) as f:
+            while True:
+                chunk = f.read(HASH_CHUNK_SIZE)
+                if not chunk:
+                    break
+                hasher.update(chunk)
+                size += len(chunk)
+        return hasher.hexdigest(), size
+
+    def move(self, filename: str, new_filename: str) -> None:
+        """Rename a stored file; S3 copies the object server-side and deletes the original"""
+        with self._operation('move', filename):
+            source = self._get_full_path(filename)
+            target = self._get_full_path(new_filename)
+            if self.protocol == 's3':
+                self._log_file("Moving S3 file %s to %s", source, target)
+                self.fs.mv(f"{self.bucket}/{source}", f"{self.bucket}/{target}")
+            else:
+                self._log_file("Moving local file %s to %s", source, target)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                os.replace(source, target)
+
+    def _map_concurrently(self, func, items) -> list:
+        """
+        Run func over items on the backend's bounded thread pool, preserving order.
+        Each call runs inside the caller's app context. Exceptions are returned, not raised
+        """
+        items = list(items)
+        if len(items) <= 1 or self.max_concurrency == 1:
+            results = []
+            for item in items:
+                try:
+                    results.append(func(item))
+                except Exception as e:
+                    results.append(e)
+            return results
+
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_concurrency, thread_name_prefix='storage'
+                )
+        app = current_app._get_current_object()
+
+        def call(item):
+            with app.app_context():
+                return func(item)
+
+        futures = [self._executor.submit(call, item) for item in items]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def save_many(self, files: List[Tuple[FileStorage, str]]) -> List[str]:
+        """
+        Save several (file_storage, filename) pairs concurrently.
+        Raises the first error once every transfer has finished; returns the storage URLs
+        """
+        results = self._map_concurrently(lambda item: self.save(*item), files)
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+        return results
+
+    def reset(self) -> None:
+        """Drop the transfer pool without waiting, e.g. in a freshly forked worker"""
+        with self._executor_lock:
+            self._executor = None
+
+    def create_multipart_upload(self, filename: str) -> Optional[str]:
+        """
+        Start a multipart upload that writes parts straight to storage.
+        Returns the S3 upload id; local storage creates an empty (sparse) file instead
+        """
         full_path = self._get_full_path(filename)
         if self.protocol == 's3':
-            return self.fs.open(f"{self.bucket}/{full_path}", mode)
-        return self.fs.open(full_path, mode)
+            response = self.fs.call_s3('create_multipart_upload', Bucket=self.bucket, Key=full_path,
+                                       CacheControl=OBJECT_CACHE_CONTROL)
+            self.logger.info("Started S3 multipart upload %s for %s", response['UploadId'], full_path)
+            return response['UploadId']
+
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        open(full_path, 'wb').close()
+        self.logger.info("Started local chunked upload for %s", full_path)
+        return None
+
+    def upload_part(self, filename: str, upload_id: Optional[str], part_number: int,
+                    offset: int, data: bytes) -> str:
+        """
+        Write one part of a multipart upload. Parts may arrive in any order and be
+        re-sent after an interruption. Returns the part's ETag
+        """
+        full_path = self._get_full_path(filename)
+        if self.protocol == 's3':
+            response = self.fs.call_s3(
+                'upload_part', Bucket=self.bucket, Key=full_path,
+                UploadId=upload_id, PartNumber=part_number, Body=data
+            )
+            return response['ETag'].strip('"')
+
+        # Writing at the part's offset keeps the file sparse until every part has arrived
+        with open(full_path, 'r+b') as f:
+            f.seek(offset)
+            f.write(data)
+        return hashlib.md5(data).hexdigest()
+
+    def complete_multipart_upload(self, filename: str, upload_id: Optional[str],
+                                  parts: List[Tuple[int, str]]) -> None:
+        """Assemble a multipart upload from its (part_number, etag) pairs"""
+        if self.protocol == 's3':
+            full_path = self._get_full_path(filename)
+            self.fs.call_s3(
+                'complete_multipart_upload', Bucket=self.bucket, Key=full_path, UploadId=upload_id,
+                MultipartUpload={'Parts': [
+                    {'PartNumber': number, 'ETag': f'"{etag}"'} for number, etag in sorted(parts)
+                ]}
+            )
+            self.fs.invalidate_cache(f"{self.bucket}/{full_path}")
+        self.logger.info("Completed multipart upload of %s with %d part(s)", filename, len(parts))
+
+    def abort_multipart_upload(self, filename: str, upload_id: Optional[str]) -> None:
+        """Abandon a multipart upload and discard the parts written so far"""
+        if self.protocol == 's3':
+            full_path = self._get_full_path(filename)
+            self.fs.call_s3('abort_multipart_upload', Bucket=self.bucket, Key=full_path, UploadId=upload_id)
+            self.logger.info("Aborted S3 multipart upload %s for %s", upload_id, full_path)
+        else:
+            self.delete(filename)
+
+    def _open_s3(self, s3_path: str, offset: int = 0, length: Optional[int] = None) -> BinaryIO:
+        """
+        Open an S3 object, or length bytes of it from offset, for sequential reading,
+        through the disk cache when enabled
+        """
+        if self.cache is not None:
+            cached = self.cache.open(s3_path)
+            if cached is not None:
+                if offset:
+                    cached.seek(offset)
+                return cached
+
+        bucket, key = s3_path.split('/', 1)
+        stream = S3ObjectReader(self.fs, bucket, key, offset, length)
+        if self.cache is not None and stream.size is not None:
+            # Reads of the whole object fill the cache as they go
+            stream = self.cache.wrap(s3_path, stream, stream.size)
+        return stream
+
+    def open(self, filename: str, mode: str = 'rb') -> BinaryIO:
+        """Open a file from storage"""
+        with self._operation('open', filename):
+            full_path = self._get_full_path(filename)
+            if self.protocol == 's3':
+                if mode == 'rb':
+                    return self._open_s3(f"{self.bucket}/{full_path}")
+                return self.fs.open(f"{self.bucket}/{full_path}", mode)
+            return self.fs.open(full_path, mode)
 
     def delete(self, filename: str) -> bool:
         """
@@ -119,40 +452,77 @@ class StorageBackend:
         Returns True if file was deleted or didn't exist, False if deletion failed
         """
         try:
-            full_path = self._get_full_path(filename)
-            if self.protocol == 's3':
-                path = f"{self.bucket}/{full_path}"
-                self.logger.debug(f"Attempting to delete S3 file: {path}")
-                if self.fs.exists(path):
-                    self.logger.debug(f"File exists, deleting: {path}")
-                    self.fs.delete(path)
-                    deleted = not self.fs.exists(path)
-                    if deleted:
-                        self.logger.debug(f"Successfully deleted file: {path}")
-                    else:
-                        self.logger.error(f"Failed to delete file: {path}")
-                    return deleted
-                self.logger.debug(f"File doesn't exist, skipping delete: {path}")
-                return True  # File didn't exist
-            else:
-                self.logger.debug(f"Attempting to delete local file: {full_path}")
-                if self.fs.exists(full_path):
-                    self.logger.debug(f"File exists, deleting: {full_path}")
-                    self.fs.delete(full_path)
-                    deleted = not os.path.exists(full_path)
-                    if deleted:
-                        self.logger.debug(f"Successfully deleted file: {full_path}")
-                    else:
-                        self.logger.error(f"Failed to delete file: {full_path}")
-                    return deleted
-                self.logger.debug(f"File doesn't exist, skipping delete: {full_path}")
-                return True  # File didn't exist
+            with self._operation('delete', filename):
+                full_path = self._get_full_path(filename)
+                if self.protocol == 's3':
+                    path = f"{self.bucket}/{full_path}"
+                    self._log_file("Deleting S3 file: %s", path)
+                    # DeleteObject succeeds for missing keys too, so its response is enough
+                    self.fs.rm_file(path)
+                    if self.cache is not None:
+                        self.cache.invalidate(path)
+                else:
+                    self._log_file("Deleting local file: %s", full_path)
+                    try:
+                        os.remove(full_path)
+                    except FileNotFoundError:
+                        self._log_file("File doesn't exist, skipping delete: %s", full_path)
+            return True
         except Exception as e:
-            self.logger.error(f"Failed to delete file {filename}: {str(e)}", exc_info=True)
+            self.logger.error("Failed to delete file %s: %s", filename, e, exc_info=True)
             return False
 
+    def delete_many(self, filenames: List[str]) -> List[str]:
+        """
+        Delete several files, using S3 multi-object delete (one request per 1000 keys)
+        or concurrent deletes on local storage.
+        Returns the filenames that could not be deleted
+        """
+        if self.protocol != 's3':
+            results = self._map_concurrently(self.delete, filenames)
+            return [filename for filename, deleted in zip(filenames, results) if deleted is not True]
+
+        failed = []
+        keys = {self._get_full_path(filename): filename for filename in filenames}
+        key_list = list(keys)
+        for start in range(0, len(key_list), S3_DELETE_BATCH_SIZE):
+            batch = key_list[start:start + S3_DELETE_BATCH_SIZE]
+            try:
+                with self._operation('delete_many', f"{len(batch)} files"):
+                    response = self.fs.call_s3(
+                        'delete_objects', Bucket=self.bucket,
+                        Delete={'Objects': [{'Key': key} for key in batch], 'Quiet': True}
+                    )
+                for error in response.get('Errors', []):
+                    self.logger.error("Failed to delete S3 file %s: %s", error.get('Key'), error.get('Message'))
+                    failed.append(keys.get(error.get('Key'), error.get('Key')))
+            except Exception as e:
+                self.logger.error("Failed to delete batch of %d S3 files: %s", len(batch), e, exc_info=True)
+                failed.extend(keys[key] for key in batch)
+            for key in batch:
+                self.fs.invalidate_cache(f"{self.bucket}/{key}")
+                if self.cache is not None:
+                    self.cache.invalidate(f"{self.bucket}/{key}")
+        return failed
+
     def url_for(self, filename: str) -> str:
-        """Get URL for a file"""
+        """Get URL for a file, memoized per filename"""
+        key = (request.script_root if has_request_context() else '', filename)
+        with self._url_cache_lock:
+            url = self._url_cache.get(key)
+            if url is not None:
+                self._url_cache.move_to_end(key)
+                return url
+
+        url = self._build_url(filename)
+        with self._url_cache_lock:
+            self._url_cache[key] = url
+            if len(self._url_cache) > URL_CACHE_SIZE:
+                self._url_cache.popitem(last=False)
+        return url
+
+    def _build_url(self, filename: str) -> str:
+        """Build the public URL for a file"""
         if self.protocol == 's3':
             full_path = self._get_full_path(filename)
             if os.getenv('S3_PUBLIC_URL'):
@@ -174,17 +544,72 @@ class StorageBackend:
             return self.fs.exists(f"{self.bucket}/{full_path}")
         return self.fs.exists(full_path)
 
-    def get_file_stream(self, filename: str):
-        """Get a file stream from storage"""
+    def presigned_url(self, filename: str, download_name: Optional[str] = None,
+                      mime_type: Optional[str] = None, expires_in: int = 300) -> Optional[str]:
+        """
+        Get a short-lived presigned GET URL so clients download straight from the bucket.
+        Returns None for local storage
+        """
+        if self.protocol != 's3':
+            return None
+        params = {}
+        if download_name:
+            params['ResponseContentDisposition'] = f'attachment; filename="{download_name}"'
+        if mime_type:
+            params['ResponseContentType'] = mime_type
+        s3_path = f"{self.bucket}/{self._get_full_path(filename)}"
+        self._log_file("Presigning S3 download URL for %s, expires in %ds", s3_path, expires_in)
+        return self.fs.sign(s3_path, expiration=expires_in, **params)
+
+    def local_path(self, filename: str) -> Optional[str]:
+        """Absolute filesystem path of a file for local storage, None for remote backends"""
+        if self.protocol == 's3':
+            return None
+        return self._get_full_path(filename)
+
+    def info(self, filename: str) -> dict:
+        """
+        Get size, last modification time and an ETag for a file.
+        Raises FileNotFoundError if the file does not exist
+        """
+        with self._operation('info', filename):
+            return self._info(filename)
+
+    def _info(self, filename: str) -> dict:
+        full_path = self._get_full_path(filename)
+        if self.protocol == 's3':
+            details = self.fs.info(f"{self.bucket}/{full_path}")
+            last_modified = details.get('LastModified')
+            return {
+                'size': details['size'],
+                'last_modified': last_modified,
+                'etag': (details.get('ETag') or '').strip('"') or None,
+            }
+        st = os.stat(full_path)
+        return {
+            'size': st.st_size,
+            'last_modified': datetime.fromtimestamp(st.st_mtime, tz=timezone.utc),
+            'etag': f"{st.st_mtime_ns:x}-{st.st_size:x}",
+        }
+
+    def get_file_stream(self, filename: str, offset: int = 0, length: Optional[int] = None):
+        """
+        Get a file stream from storage, positioned at offset. On S3 this is a ranged read
+        of length bytes (to the end without it), so nothing outside them is transferred.
+        """
         try:
-            if self.protocol == 's3':
-                s3_path = f"{self.bucket}/{self._get_full_path(filename)}"
-                self.logger.debug(f"Opening S3 file stream: {s3_path}")
-                return self.fs.open(s3_path, 'rb')
-            else:
+            with self._operation('open', filename):
+                if self.protocol == 's3':
+                    s3_path = f"{self.bucket}/{self._get_full_path(filename)}"
+                    self._log_file("Opening S3 file stream: %s at offset %d", s3_path, offset)
+                    return self._open_s3(s3_path, offset, length)
+
                 full_path = self._get_full_path(filename)
-                self.logger.debug(f"Opening local file stream: {full_path}")
-                return open(full_path, 'rb')
+                self._log_file("Opening local file stream: %s at offset %d", full_path, offset)
+                stream = open(full_path, 'rb')
+                if offset:
+                    stream.seek(offset)
+                return stream
         except Exception as e:
-            self.logger.error(f"Failed to get file stream for {filename}: {str(e)}", exc_info=True)
-            raise 
\ No newline at end of file
+            self.logger.error("Failed to get file stream for %s: %s", filename, e, exc_info=True)
+            raise
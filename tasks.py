@@ -0,0 +1,248 @@
+import os
+import time
+import uuid
+import shutil
+import logging
+import tempfile
+import functools
+import threading
+import multiprocessing
+from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List
+from sqlalchemy import and_, or_
+from werkzeug.datastructures import FileStorage
+from image_processor import ImageProcessor, rendition_filename, avif_filename, avif_supported
+
+logger = logging.getLogger(__name__)
+
+STATUS_PROCESSING = 'processing'
+STATUS_READY = 'ready'
+STATUS_FAILED = 'failed'
+
+def process_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    Process pool for image conversion. Workers start from a forkserver (spawn where that
+    is unavailable) rather than forking a process that already runs request, storage
+    and loop threads, whose locks a forked child could inherit held
+    """
+    method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(method))
+
+def _write_output(output, path: str) -> str:
+    with output, open(path, 'wb') as f:
+        shutil.copyfileobj(output, f)
+    return path
+
+CONTENT_TYPES = {'WEBP': 'image/webp', 'AVIF': 'image/avif'}
+
+@functools.lru_cache(maxsize=None)
+def _avif_available() -> bool:
+    if avif_supported():
+        return True
+    logger.warning("IMAGE_AVIF is set but Pillow can't encode AVIF; storing WebP only")
+    return False
+
+def avif_enabled(config) -> bool:
+    """Whether to store AVIF copies: IMAGE_AVIF is set and Pillow has an AVIF encoder"""
+    return config['IMAGE_AVIF'] and _avif_available()
+
+def convert_featured_image(source_path: str, work_dir: str, widths: List[int], profile: str,
+                           avif: bool, max_dimension: int, max_pixels: int) -> dict:
+    """
+    Convert a raw featured image file to WebP (and AVIF) plus renditions, written into work_dir.
+    Runs in a worker process, so it takes and returns file paths rather than image data.
+    Outputs are listed as (rendition width or None for the full image, format, path)
+    """
+    with open(source_path, 'rb') as source:
+        result = ImageProcessor.process_featured_image(source, widths, profile, avif, max_dimension, max_pixels)
+
+    outputs = [(None, 'WEBP', _write_output(result['image'], os.path.join(work_dir, 'image.webp')))]
+    if result['avif'] is not None:
+        outputs.append((None, 'AVIF', _write_output(result['avif'], os.path.join(work_dir, 'image.avif'))))
+    for width, image_format, rendition in result['renditions']:
+        path = os.path.join(work_dir, f"{width}w.{image_format.lower()}")
+        outputs.append((width, image_format, _write_output(rendition, path)))
+    return {
+        'ext': result['ext'],
+        'width': result['width'],
+        'avif': result['avif'] is not None,
+        'renditions': sorted({width for width, _, _ in outputs if width is not None}),
+        'outputs': outputs,
+    }
+
+class ImageJobQueue:
+    """
+    Runs featured image conversion off the request thread.
+
+    Jobs are coordinated on a small thread pool (storage and database I/O) and the
+    CPU-bound conversion is handed to a process pool, or done on the coordinating
+    thread when IMAGE_WORKER_TYPE is 'thread'. With IMAGE_WORKERS set to 0 jobs run
+    synchronously in the caller, which is useful for development.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self._executor = None
+        self._cpu_pool = None
+        self._sweeper = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions['image_jobs'] = self
+
+    def _get_executors(self):
+        # Pools are created lazily so they are never inherited across a fork
+        with self._lock:
+            if self._executor is None:
+                workers = self.app.config['IMAGE_WORKERS']
+                self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='image-job')
+                if self.app.config['IMAGE_WORKER_TYPE'] == 'process':
+                    self._cpu_pool = process_pool(workers)
+            return self._executor, self._cpu_pool
+
+    def reset(self):
+        """Drop the pools without waiting, e.g. in a freshly forked worker"""
+        with self._lock:
+            self._executor = None
+            self._cpu_pool = None
+            self._sweeper = None
+
+    def submit(self, asset_id: int):
+        """Queue conversion of an asset's pending featured image"""
+        if self.app.config['IMAGE_WORKERS'] <= 0:
+            self.run(asset_id)
+            return
+        executor, _ = self._get_executors()
+        executor.submit(self.run, asset_id)
+
+    def requeue_stale(self) -> int:
+        """
+        Requeue conversions still pending after IMAGE_JOB_STALE_SECONDS, e.g. because the
+        worker that queued them was recycled. Each asset is claimed with a conditional
+        update first, so only one worker picks it up. Returns the number requeued
+        """
+        from extensions import db
+        from models import Asset
+
+        with self.app.app_context():
+            cutoff = datetime.utcnow() - timedelta(seconds=self.app.config['IMAGE_JOB_STALE_SECONDS'])
+            stale = and_(
+                Asset.featured_image_status == STATUS_PROCESSING,
+                or_(Asset.featured_image_queued_at.is_(None), Asset.featured_image_queued_at < cutoff),
+            )
+            claimed = []
+            for asset_id, in db.session.query(Asset.id).filter(stale).all():
+                if Asset.query.filter(Asset.id == asset_id, stale).update(
+                    {Asset.featured_image_queued_at: datetime.utcnow()}, synchronize_session=False
+                ):
+                    claimed.append(asset_id)
+            db.session.commit()
+
+        for asset_id in claimed:
+            self.submit(asset_id)
+        return len(claimed)
+
+    def start_sweeper(self):
+        """Requeue stale conversions now and every third of IMAGE_JOB_STALE_SECONDS, on a daemon thread"""
+        with self._lock:
+            if self._sweeper is not None:
+                return
+            self._sweeper = threading.Thread(target=self._sweep, name='image-job-sweeper', daemon=True)
+            self._sweeper.start()
+
+    def _sweep(self):
+        interval = max(30, self.app.config['IMAGE_JOB_STALE_SECONDS'] // 3)
+        while True:
+            try:
+                requeued = self.requeue_stale()
+                if requeued:
+                    logger.info("Requeued %d stale featured image job(s)", requeued)
+            except Exception:
+                logger.exception("Requeueing stale featured image jobs failed")
+            time.sleep(interval)
+
+    def _convert(self, source_path: str, work_dir: str) -> dict:
+        args = (
+            source_path,
+            work_dir,
+            self.app.config['IMAGE_RENDITION_WIDTHS'],
+            self.app.config['IMAGE_ENCODE_PROFILE'],
+            avif_enabled(self.app.config),
+            self.app.config['IMAGE_MAX_DIMENSION'],
+            self.app.config['IMAGE_MAX_PIXELS'],
+        )
+        _, cpu_pool = self._get_executors() if self.app.config['IMAGE_WORKERS'] > 0 else (None, None)
+        if cpu_pool is not None:
+            return cpu_pool.submit(convert_featured_image, *args).result()
+        return convert_featured_image(*args)
+
+    def run(self, asset_id: int):
+        """Convert an asset's raw featured image and swap the WebP in place of it"""
+        from extensions import db
+        from models import Asset
+
+        with self.app.app_context():
+            storage = self.app.storage
+            asset = db.session.get(Asset, asset_id)
+            if asset is None or asset.featured_image_status != STATUS_PROCESSING:
+                return
+            source_filename = asset.featured_image
+            saved = []
+
+            try:
+                # Source and outputs go through temp files so no image is held in memory whole
+                with tempfile.TemporaryDirectory(prefix='image-job-') as work_dir:
+                    source_path = os.path.join(work_dir, 'source')
+                    with storage.open(source_filename) as f, open(source_path, 'wb') as out:
+                        shutil.copyfileobj(f, out)
+                    result = self._convert(source_path, work_dir)
+
+                    filename = f"{uuid.uuid4().hex}{result['ext']}"
+                    outputs = []
+                    for width, image_format, path in result['outputs']:
+                        name = filename if width is None else rendition_filename(filename, width)
+                        if image_format == 'AVIF':
+                            name = avif_filename(name)
+                        outputs.append((name, CONTENT_TYPES[image_format], path))
+                    saved = [name for name, _, _ in outputs]
+                    streams = [open(path, 'rb') for _, _, path in outputs]
+                    try:
+                        storage.save_many([
+                            (FileStorage(stream=stream, filename=name, content_type=content_type), name)
+                            for stream, (name, content_type, _) in zip(streams, outputs)
+                        ])
+                    finally:
+                        for stream in streams:
+                            stream.close()
+
+                # The asset may have been edited or deleted while we were converting
+                db.session.refresh(asset)
+                if asset.featured_image != source_filename:
+                    raise LookupError(f"Featured image of asset {asset_id} changed during processing")
+
+                asset.featured_image = filename
+                asset.featured_image_width = result['width']
+                asset.featured_image_renditions = ','.join(str(width) for width in result['renditions']) or None
+                asset.featured_image_avif = result['avif']
+                asset.featured_image_status = STATUS_READY
+                db.session.commit()
+                storage.delete(source_filename)
+
+            except Exception as e:
+                db.session.rollback()
+                storage.delete_many(saved)
+                if isinstance(e, LookupError) or db.session.get(Asset, asset_id) is None:
+                    logger.info("Discarding featured image job for asset %s: %s", asset_id, e)
+                    return
+                logger.error("Featured image processing failed for asset %s: %s", asset_id, e, exc_info=True)
+                asset = db.session.get(Asset, asset_id)
+                if asset is not None and asset.featured_image == source_filename:
+                    # Never leave the unconverted upload as the served image
+                    asset.featured_image = None
+                    asset.featured_image_status = STATUS_FAILED
+                    db.session.commit()
+                    storage.delete(source_filename)
@@ -0,0 +1,126 @@
+import io
+import os
+import shutil
+import socket
+import sqlite3
+import tempfile
+import urllib.request
+from contextlib import contextmanager
+
+import pytest
+from PIL import Image
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+
+# The app is configured from the environment when app.py is imported, so point it at
+# throwaway storage first. Images are converted synchronously within the request.
+TEST_DIR = tempfile.mkdtemp(prefix='asset-tests-')
+os.environ.update({
+    'DATABASE_URL': f"sqlite:///{os.path.join(TEST_DIR, 'test.db')}",
+    'STORAGE_URL': f"file://{os.path.join(TEST_DIR, 'uploads')}",
+    'IMAGE_WORKERS': '0',
+    'IMAGE_AVIF': 'false',
+    'METRICS_ENABLED': 'false',
+    'LOGGING_LEVEL': 'WARNING',
+})
+
+@event.listens_for(Engine, 'connect')
+def _enforce_foreign_keys(dbapi_connection, connection_record):
+    """SQLite ignores foreign keys unless asked; enforce them like Postgres does"""
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA foreign_keys=ON')
+        cursor.close()
+
+@pytest.fixture(scope='session')
+def app():
+    from flask_migrate import upgrade
+    from app import app
+
+    app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+    with app.app_context():
+        upgrade(directory=os.path.join(app.root_path, 'migrations'))
+    return app
+
+@pytest.fixture(autouse=True)
+def clean_db(app):
+    """Empty the database and storage after each test"""
+    yield
+    from extensions import db
+    from search import SEARCH_TABLE
+
+    with app.app_context():
+        db.session.remove()
+        for table in ('upload_part', 'upload', 'asset_file', 'blob', 'asset', SEARCH_TABLE):
+            db.session.execute(text(f"DELETE FROM {table}"))
+        db.session.commit()
+    # Stored files go too, so blobs left behind by one test can't satisfy the next
+    shutil.rmtree(os.path.join(TEST_DIR, 'uploads'), ignore_errors=True)
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+def image_bytes(size=(64, 48), image_format='PNG', color='red'):
+    buf = io.BytesIO()
+    Image.new('RGB', size, color).save(buf, image_format)
+    return buf.getvalue()
+
+@pytest.fixture
+def add_asset(client):
+    """Create an asset through the add route; returns its id"""
+    def add(title='Test asset', files=(), **form):
+        data = {
+            'title': title,
+            'featured_image': (io.BytesIO(image_bytes()), 'featured.png'),
+            'additional_files': [(io.BytesIO(content), name) for name, content in files],
+        }
+        data.update(form)
+        response = client.post('/asset/add', data=data, content_type='multipart/form-data')
+        body = response.get_json()
+        assert body['success'], body
+        return int(body['status_url'].split('/')[-2])
+    return add
+
+@pytest.fixture
+def s3_storage(app, monkeypatch):
+    """Point the app at a bucket on a local moto S3 server"""
+    # s3fs talks to S3 through aiobotocore, which moto's in-process mock doesn't patch,
+    # so run moto as a server instead
+    server_module = pytest.importorskip('moto.server')
+    from storage import StorageBackend
+
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    server = server_module.ThreadedMotoServer(ip_address='127.0.0.1', port=port, verbose=False)
+    server.start()
+    monkeypatch.setenv('S3_ENDPOINT_URL', f'http://127.0.0.1:{port}')
+    monkeypatch.setenv('S3_ACCESS_KEY', 'test')
+    monkeypatch.setenv('S3_SECRET_KEY', 'test')
+    monkeypatch.delenv('S3_PUBLIC_URL', raising=False)
+
+    storage = StorageBackend('s3://test-bucket')
+    storage.fs.mkdir('test-bucket')
+    monkeypatch.setattr(app, 'storage', storage)
+    yield storage
+    # moto keeps its buckets in-process, shared by every server; start the next test empty
+    urllib.request.urlopen(urllib.request.Request(f'http://127.0.0.1:{port}/moto-api/reset', method='POST'))
+    server.stop()
+
+@contextmanager
+def count_queries(app):
+    """Count the SQL statements executed inside the block; yields a list filled with them"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    from extensions import db
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
@@ -0,0 +1,138 @@
+import hashlib
+import io
+import os
+
+from conftest import TEST_DIR, image_bytes
+from models import Asset, AssetFile, Blob
+from storage import blob_filename
+
+def _stored_files():
+    root = os.path.join(TEST_DIR, 'uploads')
+    return sorted(os.path.join(path, name) for path, _, names in os.walk(root) for name in names)
+
+def test_add_asset_with_unknown_upload_leaves_nothing_behind(app, client):
+    before = _stored_files()
+    response = client.post('/asset/add', data={
+        'title': 'Broken',
+        'featured_image': (io.BytesIO(image_bytes()), 'featured.png'),
+        'additional_files': [(io.BytesIO(b'file content'), 'a.zip')],
+        'upload_ids': ['doesnotexist'],
+    }, content_type='multipart/form-data')
+
+    body = response.get_json()
+    assert not body['success']
+    with app.app_context():
+        assert Asset.query.count() == 0
+        assert AssetFile.query.count() == 0
+        assert Blob.query.count() == 0
+    assert _stored_files() == before
+
+def test_edit_asset_with_unknown_upload_keeps_featured_image(app, client, add_asset):
+    asset_id = add_asset('Original')
+    with app.app_context():
+        featured_files = Asset.query.get(asset_id).featured_image_files
+    before = _stored_files()
+
+    response = client.post(f'/asset/{asset_id}/edit', data={
+        'title': 'Renamed',
+        'featured_image': (io.BytesIO(image_bytes(color='blue')), 'new.png'),
+        'upload_ids': ['doesnotexist'],
+    }, content_type='multipart/form-data')
+
+    assert not response.get_json()['success']
+    with app.app_context():
+        asset = Asset.query.get(asset_id)
+        assert asset.title == 'Original'
+        assert asset.featured_image_files == featured_files
+    assert _stored_files() == before
+
+def test_listing_and_search_serialize_assets_alike(client, add_asset):
+    add_asset('Searchable asset', files=[('a.zip', b'file content')])
+
+    listed, = client.get('/api/assets').get_json()['assets']
+    found, = client.get('/api/search?q=searchable').get_json()['assets']
+    assert listed == found
+    assert listed['title'] == 'Searchable asset'
+    assert listed['file_count'] == 1
+
+def _post_featured(client, content, name='x.png'):
+    return client.post('/asset/add', data={
+        'title': 'Featured',
+        'featured_image': (io.BytesIO(content), name),
+    }, content_type='multipart/form-data').get_json()
+
+def test_add_asset_rejects_non_image(app, client):
+    body = _post_featured(client, b'not an image')
+    assert not body['success']
+    assert body['error'] == 'Invalid featured image format'
+    with app.app_context():
+        assert Asset.query.count() == 0
+
+def test_add_asset_rejects_image_over_pixel_limit(app, client, monkeypatch):
+    monkeypatch.setitem(app.config, 'IMAGE_MAX_PIXELS', 64 * 48 - 1)
+    before = _stored_files()
+
+    body = _post_featured(client, image_bytes((64, 48)))
+    assert not body['success']
+    assert 'too large' in body['error']
+    with app.app_context():
+        assert Asset.query.count() == 0
+    assert _stored_files() == before
+
+def test_failed_conversion_does_not_serve_raw_upload(app, client, add_asset, monkeypatch):
+    import tasks
+
+    def fail(*args):
+        raise RuntimeError('encoder crashed')
+    monkeypatch.setattr(tasks, 'convert_featured_image', fail)
+    before = _stored_files()
+
+    asset_id = add_asset()
+    assert client.get(f'/asset/{asset_id}/status').get_json()['status'] == tasks.STATUS_FAILED
+    with app.app_context():
+        assert Asset.query.get(asset_id).featured_image is None
+    assert _stored_files() == before
+    assert b'image-placeholder' in client.get(f'/asset/{asset_id}').data
+    assert b'image-placeholder' in client.get('/').data
+
+def test_stale_processing_jobs_are_requeued(app, add_asset):
+    from datetime import datetime, timedelta
+
+    from extensions import db, image_jobs
+    import tasks
+
+    stale_id, fresh_id = add_asset('Stale'), add_asset('Fresh')
+    with app.app_context():
+        # As if their jobs were lost with a recycled worker
+        for asset_id, queued_at in ((stale_id, datetime.utcnow() - timedelta(hours=1)), (fresh_id, datetime.utcnow())):
+            asset = db.session.get(Asset, asset_id)
+            asset.featured_image_status = tasks.STATUS_PROCESSING
+            asset.featured_image_queued_at = queued_at
+        db.session.commit()
+
+    assert image_jobs.requeue_stale() == 1
+    with app.app_context():
+        assert db.session.get(Asset, stale_id).featured_image_status == tasks.STATUS_READY
+        assert db.session.get(Asset, fresh_id).featured_image_status == tasks.STATUS_PROCESSING
+
+def test_failed_blob_transfer_removes_blobs_already_written(app, client, monkeypatch):
+    failing = blob_filename(hashlib.sha256(b'second file').hexdigest())
+    save = app.storage.save
+
+    def flaky_save(file_storage, filename):
+        if filename == failing:
+            raise OSError('connection reset')
+        return save(file_storage, filename)
+
+    monkeypatch.setattr(app.storage, 'save', flaky_save)
+    before = _stored_files()
+    response = client.post('/asset/add', data={
+        'title': 'Partial',
+        'featured_image': (io.BytesIO(image_bytes()), 'featured.png'),
+        'additional_files': [(io.BytesIO(b'first file'), 'a.zip'), (io.BytesIO(b'second file'), 'b.zip')],
+    }, content_type='multipart/form-data')
+
+    assert not response.get_json()['success']
+    with app.app_context():
+        assert Blob.query.count() == 0
+    assert _stored_files() == before
@@ -0,0 +1,74 @@
+import os
+
+from models import Asset, AssetFile, Blob
+from storage import blob_filename
+
+CONTENT = b'shared file content' * 100
+
+def _blob(app):
+    with app.app_context():
+        blob = Blob.query.one_or_none()
+        return (blob.digest, blob.ref_count) if blob else None
+
+def test_identical_files_share_one_blob(app, add_asset):
+    add_asset('First', files=[('a.zip', CONTENT)])
+    add_asset('Second', files=[('b.zip', CONTENT)])
+
+    digest, ref_count = _blob(app)
+    assert ref_count == 2
+    with app.app_context():
+        assert os.path.isfile(app.storage.local_path(blob_filename(digest)))
+        assert {f.filename for f in AssetFile.query} == {blob_filename(digest)}
+
+def test_delete_file_keeps_blob_used_by_another_asset(app, client, add_asset):
+    first = add_asset('First', files=[('a.zip', CONTENT)])
+    add_asset('Second', files=[('b.zip', CONTENT)])
+    with app.app_context():
+        file_id = AssetFile.query.filter_by(asset_id=first).one().id
+
+    response = client.post(f'/asset/file/{file_id}/delete', follow_redirects=True)
+    assert b'File deleted successfully' in response.data
+
+    digest, ref_count = _blob(app)
+    assert ref_count == 1
+    with app.app_context():
+        assert os.path.isfile(app.storage.local_path(blob_filename(digest)))
+
+def test_delete_last_file_removes_blob(app, client, add_asset):
+    asset_id = add_asset(files=[('a.zip', CONTENT)])
+    digest, _ = _blob(app)
+    with app.app_context():
+        file_id = AssetFile.query.filter_by(asset_id=asset_id).one().id
+        path = app.storage.local_path(blob_filename(digest))
+
+    response = client.post(f'/asset/file/{file_id}/delete', follow_redirects=True)
+    assert b'File deleted successfully' in response.data
+    assert _blob(app) is None
+    assert not os.path.exists(path)
+
+def test_delete_assets_releases_blobs(app, client, add_asset):
+    first = add_asset('First', files=[('a.zip', CONTENT)])
+    second = add_asset('Second', files=[('b.zip', CONTENT)])
+    digest, _ = _blob(app)
+    with app.app_context():
+        path = app.storage.local_path(blob_filename(digest))
+
+    response = client.post(f'/asset/{first}/delete', follow_redirects=True)
+    assert b'Asset deleted successfully' in response.data
+    assert _blob(app) == (digest, 1)
+
+    response = client.post(f'/asset/{second}/delete', follow_redirects=True)
+    assert b'Asset deleted successfully' in response.data
+    assert _blob(app) is None
+    assert not os.path.exists(path)
+    with app.app_context():
+        assert Asset.query.count() == 0
+
+def test_delete_asset_with_duplicate_files_removes_blob(app, client, add_asset):
+    asset_id = add_asset(files=[('a.zip', CONTENT), ('b.zip', CONTENT)])
+    digest, ref_count = _blob(app)
+    assert ref_count == 2
+
+    response = client.post(f'/asset/{asset_id}/delete', follow_redirects=True)
+    assert b'Asset deleted successfully' in response.data
+    assert _blob(app) is None
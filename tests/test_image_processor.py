@@ -0,0 +1,113 @@
+import io
+import os
+import subprocess
+import sys
+
+import pytest
+from PIL import Image
+
+import image_processor
+from image_processor import ImageProcessor
+
+# Converts the image at argv[1] in a fresh interpreter and prints how far peak RSS rose.
+# VmHWM starts over with the new process image, unlike ru_maxrss which carries the
+# parent's memory use across fork and exec.
+PEAK_MEMORY_SCRIPT = """
+import sys
+from image_processor import ImageProcessor
+
+def peak():
+    with open('/proc/self/status') as status:
+        line = next(line for line in status if line.startswith('VmHWM:'))
+    return int(line.split()[1]) * 1024
+
+before = peak()
+with open(sys.argv[1], 'rb') as f:
+    result = ImageProcessor.process_image(f, widths=(400, 800))
+print(peak() - before, result['width'])
+"""
+
+def peak_memory(path):
+    if not os.path.exists('/proc/self/status'):
+        pytest.skip('peak memory is read from /proc')
+    repo = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run([sys.executable, '-c', PEAK_MEMORY_SCRIPT, str(path)], cwd=repo,
+                            check=True, capture_output=True, text=True).stdout.split()
+    return int(output[0]), int(output[1])
+
+def test_large_jpeg_decoded_at_reduced_scale(tmp_path):
+    path = tmp_path / 'wide.jpg'
+    Image.new('RGB', (16000, 4000), 'red').save(path)
+
+    peak, width = peak_memory(path)
+    assert width == image_processor.MAX_IMAGE_DIMENSION
+    # Well under one full-size decode, which takes 4 bytes per pixel
+    assert peak < 16000 * 4000 * 2
+
+def test_large_png_decoded_once(tmp_path):
+    path = tmp_path / 'large.png'
+    Image.new('RGB', (6000, 5000), 'red').save(path)
+
+    peak, width = peak_memory(path)
+    assert width == image_processor.MAX_IMAGE_DIMENSION
+    # PNGs can't be decoded at reduced scale. Resampling needs the decode plus a
+    # half-resized intermediate, but any further full-size copy would exceed this
+    assert peak < 6000 * 5000 * 4 * 2.5
+
+def test_image_over_pixel_limit_rejected():
+    buf = io.BytesIO()
+    Image.new('RGB', (200, 100), 'red').save(buf, 'PNG')
+    with pytest.raises(Image.DecompressionBombError):
+        ImageProcessor.process_image(buf, max_pixels=200 * 100 - 1)
+
+def animated_gif(size=(400, 400), frames=4):
+    images = [Image.new('RGB', size, color) for color in ('red', 'blue', 'green', 'white')[:frames]]
+    buf = io.BytesIO()
+    images[0].save(buf, 'GIF', save_all=True, append_images=images[1:])
+    buf.seek(0)
+    return buf
+
+def test_oversized_animation_rejected_before_imagemagick(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError('ImageMagick should not be reached')
+    monkeypatch.setattr(image_processor, 'WandImage', fail)
+
+    with pytest.raises(Image.DecompressionBombError):
+        ImageProcessor.process_image(animated_gif(), max_pixels=400 * 400 * 3)
+
+def test_avif_skipped_without_encoder(app, add_asset, monkeypatch):
+    import tasks
+    from models import Asset
+
+    monkeypatch.setitem(app.config, 'IMAGE_AVIF', True)
+    monkeypatch.setattr(tasks, 'avif_supported', lambda: False)
+    tasks._avif_available.cache_clear()
+    try:
+        asset_id = add_asset()
+    finally:
+        tasks._avif_available.cache_clear()
+
+    with app.app_context():
+        asset = Asset.query.get(asset_id)
+        assert asset.featured_image_status == tasks.STATUS_READY
+        assert not asset.featured_image_avif
+
+def test_process_pool_workers_are_not_forked_from_caller(tmp_path):
+    import tasks
+
+    source = tmp_path / 'source.png'
+    Image.new('RGB', (64, 48), 'red').save(source)
+    with tasks.process_pool(1) as pool:
+        assert pool._mp_context.get_start_method() in ('forkserver', 'spawn')
+        result = pool.submit(tasks.convert_featured_image, str(source), str(tmp_path),
+                             [32], 'fast', False, 4096, 64_000_000).result()
+    assert result['width'] == 64
+    assert result['renditions'] == [32]
+
+def test_unknown_encode_profile_fails_at_startup(monkeypatch):
+    from app import create_app
+    from config import Config
+
+    monkeypatch.setattr(Config, 'IMAGE_ENCODE_PROFILE', 'balnced')
+    with pytest.raises(ValueError, match='IMAGE_ENCODE_PROFILE'):
+        create_app()
@@ -0,0 +1,18 @@
+import logging
+
+from flask import Flask
+
+def test_logging_level_applied():
+    from app import configure_logging
+
+    # A separate Flask object, so the shared app and its logger are left untouched
+    app = Flask('logging_test')
+    app.config['LOGGING_LEVEL'] = 'DEBUG'
+    root = logging.getLogger()
+    root_level, root_handlers = root.level, list(root.handlers)
+    try:
+        configure_logging(app)
+        assert app.logger.getEffectiveLevel() == logging.DEBUG
+    finally:
+        root.setLevel(root_level)
+        root.handlers[:] = root_handlers
@@ -0,0 +1,33 @@
+import os
+import urllib.request
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from models import AssetFile
+
+CONTENT = b'presigned download content' * 100
+
+@pytest.fixture
+def presigned_downloads(app, s3_storage, monkeypatch):
+    monkeypatch.setitem(app.config, 'S3_PRESIGNED_DOWNLOADS', True)
+    return s3_storage
+
+def test_download_redirects_to_presigned_url(app, client, add_asset, presigned_downloads):
+    asset_id = add_asset(files=[('report final.zip', CONTENT)])
+    with app.app_context():
+        file_id = AssetFile.query.filter_by(asset_id=asset_id).one().id
+
+    response = client.get(f'/download/{file_id}')
+    assert response.status_code == 302
+    assert response.headers['Cache-Control'] == 'no-store'
+
+    location = response.headers['Location']
+    assert location.startswith(f"{os.environ['S3_ENDPOINT_URL']}/test-bucket/")
+    query = parse_qs(urlparse(location).query)
+    assert 'report_final.zip' in query['response-content-disposition'][0]
+    assert {'Signature', 'X-Amz-Signature'} & set(query)
+
+    with urllib.request.urlopen(location) as signed:
+        assert signed.read() == CONTENT
+        assert 'report_final.zip' in signed.headers['Content-Disposition']
@@ -0,0 +1,60 @@
+import io
+
+import pytest
+
+from conftest import count_queries, image_bytes
+
+def _files(n):
+    return [(f'file{i}.zip', f'content {i}'.encode()) for i in range(n)]
+
+@pytest.fixture
+def library(add_asset):
+    """Build a library of assets with several files each; returns their ids"""
+    def build(assets, files_per_asset=3):
+        return [add_asset(f'Asset {i}', files=_files(files_per_asset)) for i in range(assets)]
+    return build
+
+def _queries(app, request):
+    with count_queries(app) as statements:
+        response = request()
+    assert response.status_code in (200, 302), response.status_code
+    return len(statements)
+
+@pytest.mark.parametrize('path', ['/', '/api/assets'])
+def test_listing_queries_do_not_grow_with_assets(app, client, library, path):
+    library(2)
+    few = _queries(app, lambda: client.get(path))
+    library(8)
+    many = _queries(app, lambda: client.get(path))
+    assert many == few
+    assert many <= 3
+
+def test_asset_detail_queries_do_not_grow_with_files(app, client, library):
+    small, = library(1, files_per_asset=1)
+    large, = library(1, files_per_asset=10)
+    assert _queries(app, lambda: client.get(f'/asset/{small}')) == \
+        _queries(app, lambda: client.get(f'/asset/{large}'))
+    assert _queries(app, lambda: client.get(f'/asset/{large}')) <= 3
+
+def _edit(client, asset_id):
+    return client.post(f'/asset/{asset_id}/edit', data={
+        'title': 'Edited',
+        'featured_image': (io.BytesIO(image_bytes(color='blue')), 'new.png'),
+        'additional_files': [(io.BytesIO(f'extra file for {asset_id}'.encode()), 'extra.zip')],
+    }, content_type='multipart/form-data')
+
+def test_edit_queries_do_not_grow_with_files(app, client, library):
+    small, = library(1, files_per_asset=1)
+    large, = library(1, files_per_asset=10)
+    few = _queries(app, lambda: _edit(client, small))
+    many = _queries(app, lambda: _edit(client, large))
+    assert many == few
+    assert many <= 15
+
+def test_delete_queries_do_not_grow_with_files(app, client, library):
+    small, = library(1, files_per_asset=1)
+    large, = library(1, files_per_asset=10)
+    few = _queries(app, lambda: client.post(f'/asset/{small}/delete'))
+    many = _queries(app, lambda: client.post(f'/asset/{large}/delete'))
+    assert many == few
+    assert many <= 8
@@ -0,0 +1,60 @@
+import io
+import os
+
+from werkzeug.datastructures import FileStorage
+
+from downloads import iter_file_range
+from storage import S3ObjectReader
+
+CONTENT = os.urandom(3 * 1024 * 1024)
+
+def _save(storage, name='object.bin'):
+    storage.save(FileStorage(stream=io.BytesIO(CONTENT), filename=name), name)
+    return name
+
+def test_ranged_read_fetches_only_the_range(app, s3_storage):
+    name = _save(s3_storage)
+    with app.app_context():
+        stream = s3_storage.get_file_stream(name, offset=1000, length=10)
+    assert isinstance(stream, S3ObjectReader)
+    with stream:
+        assert stream.read(64 * 1024) == CONTENT[1000:1010]
+        # The response held exactly the range, not a read-ahead block
+        assert stream.read(64 * 1024) == b''
+
+def test_streamed_ranges_and_whole_objects(app, s3_storage):
+    name = _save(s3_storage)
+    with app.app_context():
+        assert b''.join(iter_file_range(s3_storage, name, 0, len(CONTENT))) == CONTENT
+        assert b''.join(iter_file_range(s3_storage, name, 12345, 100000)) == CONTENT[12345:112345]
+        assert s3_storage.digest_stored(name)[1] == len(CONTENT)
+
+def test_range_request_through_download_route(app, client, add_asset, s3_storage):
+    from models import AssetFile
+
+    asset_id = add_asset(files=[('data.zip', CONTENT)])
+    with app.app_context():
+        file_id = AssetFile.query.filter_by(asset_id=asset_id).one().id
+
+    response = client.get(f'/download/{file_id}', headers={'Range': 'bytes=1000-1009'})
+    assert response.status_code == 206
+    assert response.data == CONTENT[1000:1010]
+
+def test_blob_download_skips_object_lookup(app, client, add_asset, s3_storage, monkeypatch):
+    from models import AssetFile
+
+    asset_id = add_asset(files=[('data.zip', CONTENT)])
+    with app.app_context():
+        asset_file = AssetFile.query.filter_by(asset_id=asset_id).one()
+
+    def no_info(filename):
+        raise AssertionError(f"unexpected HEAD for {filename}")
+
+    monkeypatch.setattr(s3_storage, 'info', no_info)
+    response = client.get(f'/download/{asset_file.id}')
+    assert response.status_code == 200
+    assert response.content_length == len(CONTENT)
+    assert response.data == CONTENT
+
+    response = client.get(f'/download/{asset_file.id}', headers={'If-None-Match': f'"{asset_file.blob_digest}"'})
+    assert response.status_code == 304
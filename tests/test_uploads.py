@@ -0,0 +1,76 @@
+import os
+
+from conftest import TEST_DIR
+from models import AssetFile, Blob, Upload
+from storage import blob_filename
+
+CONTENT = b'chunked upload content' * 100
+
+def _upload(client, content, name='big.zip'):
+    """Send a file through the chunked upload API; returns its upload id"""
+    state = client.post('/uploads', json={'filename': name, 'size': len(content)}).get_json()
+    assert state['success'], state
+    part_size = state['part_size']
+    for number in range(1, state['total_parts'] + 1):
+        part = content[(number - 1) * part_size:number * part_size]
+        assert client.put(f"/uploads/{state['upload_id']}/parts/{number}", data=part).get_json()['success']
+    completed = client.post(f"/uploads/{state['upload_id']}/complete").get_json()
+    assert completed['completed'], completed
+    return state['upload_id']
+
+def _stored_files():
+    root = os.path.join(TEST_DIR, 'uploads')
+    return sorted(os.path.relpath(os.path.join(path, name), root)
+                  for path, _, names in os.walk(root) for name in names)
+
+def test_chunked_upload_reuses_existing_blob(app, client, add_asset):
+    add_asset('Direct', files=[('a.zip', CONTENT)])
+    before = _stored_files()
+
+    upload_id = _upload(client, CONTENT)
+    assert _stored_files() == before
+    with app.app_context():
+        blob = Blob.query.one()
+        assert blob.ref_count == 2
+        assert Upload.query.get(upload_id).filename == blob_filename(blob.digest)
+
+    asset_id = add_asset('Chunked', upload_ids=[upload_id])
+    with app.app_context():
+        asset_file = AssetFile.query.filter_by(asset_id=asset_id).one()
+        assert asset_file.blob_digest == blob.digest
+        assert asset_file.original_filename == 'big.zip'
+        assert Blob.query.one().ref_count == 2
+
+def test_chunked_upload_stored_as_new_blob(app, client):
+    upload_id = _upload(client, CONTENT)
+    with app.app_context():
+        blob = Blob.query.one()
+        assert (blob.ref_count, blob.size) == (1, len(CONTENT))
+        assert Upload.query.get(upload_id).blob_digest == blob.digest
+    assert blob_filename(blob.digest) in _stored_files()
+
+def test_abort_completed_upload_releases_blob(app, client):
+    before = _stored_files()
+    upload_id = _upload(client, CONTENT)
+    assert client.delete(f'/uploads/{upload_id}').get_json()['success']
+    with app.app_context():
+        assert Blob.query.count() == 0
+        assert Upload.query.count() == 0
+    assert _stored_files() == before
+
+def test_cleanup_releases_stale_completed_uploads(app, client):
+    from datetime import datetime, timedelta
+
+    from extensions import db
+
+    before = _stored_files()
+    upload_id = _upload(client, CONTENT)
+    with app.app_context():
+        Upload.query.get(upload_id).created_at = datetime.utcnow() - timedelta(days=30)
+        db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=['assets', 'cleanup-uploads', '--max-age-hours', '1'])
+    assert 'Discarded 1 stale upload(s)' in result.output
+    with app.app_context():
+        assert Blob.query.count() == 0
+    assert _stored_files() == before
@@ -0,0 +1,145 @@
+import struct
+import zlib
+from datetime import datetime
+from typing import Callable, Iterable, Iterator, List, NamedTuple
+
+# Entries are always stored: compressed sizes can't be known before compressing,
+# and most asset files (.zip, .7z, .unitypackage, images) are compressed already
+ZIP_STORED = 0
+
+# General purpose flags: sizes and CRC follow the data (bit 3), names are UTF-8 (bit 11)
+FLAGS = 0x0808
+
+# "Version made by" host byte for Unix, so the external attributes carry file permissions
+MADE_BY_UNIX = 3 << 8
+
+ZIP64_LIMIT = 0xFFFFFFFF
+ZIP64_COUNT_LIMIT = 0xFFFF
+
+LOCAL_HEADER = struct.Struct('<IHHHHHIIIHH')
+DATA_DESCRIPTOR = struct.Struct('<IIII')
+DATA_DESCRIPTOR64 = struct.Struct('<IIQQ')
+CENTRAL_HEADER = struct.Struct('<IHHHHHHIIIHHHHHII')
+END_RECORD = struct.Struct('<IHHHHIIH')
+END_RECORD64 = struct.Struct('<IQHHIIQQQQ')
+END_LOCATOR64 = struct.Struct('<IIQI')
+
+class ZipMember(NamedTuple):
+    name: str
+    size: int
+    modified: datetime
+    read: Callable[[], Iterable[bytes]]  # Returns the member's content as chunks
+
+def _dos_datetime(dt: datetime):
+    dt = max(dt, datetime(1980, 1, 1))
+    return (
+        (dt.hour << 11) | (dt.minute << 5) | (dt.second // 2),
+        ((dt.year - 1980) << 9) | (dt.month << 5) | dt.day,
+    )
+
+class ZipStream:
+    """
+    ZIP archive generated on the fly from members of known size.
+
+    Members are stored uncompressed with their CRC-32 in a trailing data descriptor,
+    so nothing is buffered beyond the current chunk and the archive's exact length
+    is known before the first byte is produced. Zip64 records are used for members
+    or offsets beyond 4 GiB.
+    """
+
+    def __init__(self, members: List[ZipMember]):
+        self.members = members
+        self._names = [member.name.encode('utf-8') for member in members]
+
+    @staticmethod
+    def _local_extra(member: ZipMember) -> bytes:
+        if member.size >= ZIP64_LIMIT:
+            # Zip64 sizes; the real values are in the data descriptor
+            return struct.pack('<HHQQ', 0x0001, 16, 0, 0)
+        return b''
+
+    @staticmethod
+    def _central_extra(member: ZipMember, offset: int) -> bytes:
+        fields = []
+        if member.size >= ZIP64_LIMIT:
+            fields += [member.size, member.size]
+        if offset >= ZIP64_LIMIT:
+            fields.append(offset)
+        if not fields:
+            return b''
+        return struct.pack(f'<HH{len(fields)}Q', 0x0001, 8 * len(fields), *fields)
+
+    def _offsets(self) -> List[int]:
+        offsets = []
+        offset = 0
+        for member, name in zip(self.members, self._names):
+            offsets.append(offset)
+            descriptor = DATA_DESCRIPTOR64 if member.size >= ZIP64_LIMIT else DATA_DESCRIPTOR
+            offset += LOCAL_HEADER.size + len(name) + len(self._local_extra(member)) + member.size + descriptor.size
+        offsets.append(offset)
+        return offsets
+
+    def _central_directory(self, offsets: List[int], crcs: List[int]) -> bytes:
+        records = []
+        for member, name, offset, crc in zip(self.members, self._names, offsets, crcs):
+            extra = self._central_extra(member, offset)
+            version = 45 if extra else 20
+            dos_time, dos_date = _dos_datetime(member.modified)
+            records.append(CENTRAL_HEADER.pack(
+                0x02014b50, MADE_BY_UNIX | version, version, FLAGS, ZIP_STORED, dos_time, dos_date, crc,
+                min(member.size, ZIP64_LIMIT), min(member.size, ZIP64_LIMIT),
+                len(name), len(extra), 0, 0, 0, 0o100644 << 16, min(offset, ZIP64_LIMIT)
+            ) + name + extra)
+        return b''.join(records)
+
+    def _end_records(self, cd_offset: int, cd_size: int) -> bytes:
+        count = len(self.members)
+        records = b''
+        if count >= ZIP64_COUNT_LIMIT or cd_offset >= ZIP64_LIMIT or cd_size >= ZIP64_LIMIT:
+            end64_offset = cd_offset + cd_size
+            records += END_RECORD64.pack(0x06064b50, END_RECORD64.size - 12, 45, 45, 0, 0,
+                                         count, count, cd_size, cd_offset)
+            records += END_LOCATOR64.pack(0x07064b50, 0, end64_offset, 1)
+        records += END_RECORD.pack(
+            0x06054b50, 0, 0, min(count, ZIP64_COUNT_LIMIT), min(count, ZIP64_COUNT_LIMIT),
+            min(cd_size, ZIP64_LIMIT), min(cd_offset, ZIP64_LIMIT), 0
+        )
+        return records
+
+    def __len__(self) -> int:
+        offsets = self._offsets()
+        # CRCs don't affect the size of the central directory
+        cd_size = len(self._central_directory(offsets, [0] * len(self.members)))
+        return offsets[-1] + cd_size + len(self._end_records(offsets[-1], cd_size))
+
+    def __iter__(self) -> Iterator[bytes]:
+        offsets = self._offsets()
+        crcs = []
+        for member, name in zip(self.members, self._names):
+            dos_time, dos_date = _dos_datetime(member.modified)
+            extra = self._local_extra(member)
+            zip64 = member.size >= ZIP64_LIMIT
+            yield LOCAL_HEADER.pack(
+                0x04034b50, 45 if zip64 else 20, FLAGS, ZIP_STORED, dos_time, dos_date,
+                0, ZIP64_LIMIT if zip64 else 0, ZIP64_LIMIT if zip64 else 0, len(name), len(extra)
+            ) + name + extra
+
+            crc = 0
+            written = 0
+            for chunk in member.read():
+                crc = zlib.crc32(chunk, crc)
+                written += len(chunk)
+                yield chunk
+            if written != member.size:
+                # The announced Content-Length can no longer be honoured
+                raise IOError(f"{member.name} is {written} bytes, expected {member.size}")
+            crcs.append(crc)
+
+            if zip64:
+                yield DATA_DESCRIPTOR64.pack(0x08074b50, crc, member.size, member.size)
+            else:
+                yield DATA_DESCRIPTOR.pack(0x08074b50, crc, member.size, member.size)
+
+        central_directory = self._central_directory(offsets, crcs)
+        yield central_directory
+        yield self._end_records(offsets[-1], len(central_directory))